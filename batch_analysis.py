@@ -0,0 +1,251 @@
+import argparse
+import json
+import multiprocessing
+import multiprocessing.util
+import os
+import sys
+import time
+
+import chess
+import chess.engine
+
+from match_runner import check_engines, open_engine, parse_engine_options
+
+
+# Per-worker engine, opened on the worker's first task
+_worker_state = {}
+
+
+def iter_positions(paths, skip=frozenset()):
+    """Yield tasks for every FEN/EPD line of paths, streaming the files
+
+    Positions whose (file, line) key is in skip were analysed by an earlier
+    run and are left out.
+    """
+    for path in paths:
+        with open(path, 'r') as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                if (path, line_number) in skip:
+                    continue
+                yield {"file": path, "line": line_number, "text": line}
+
+
+def parse_position(text):
+    """Return (board, EPD operations) for a FEN or EPD line"""
+    board = chess.Board()
+    try:
+        board.set_fen(text)
+        return board, {}
+    except ValueError:
+        return board, board.set_epd(text)
+
+
+def _init_worker(settings):
+    # Nothing here may raise, or the pool respawns the worker forever
+    _worker_state["settings"] = settings
+    multiprocessing.util.Finalize(None, _close_worker_engine, exitpriority=16)
+
+
+def _worker_engine():
+    """The worker's engine, started on first use and again after a crash
+
+    Returns None once it cannot be started: the worker's remaining positions
+    are then recorded as errors, to be retried when the run is resumed.
+    """
+    if "unavailable" in _worker_state:
+        return None
+    if "engine" not in _worker_state:
+        settings = _worker_state["settings"]
+        try:
+            _worker_state["engine"] = open_engine(settings["engine"], settings["options"])
+        except (OSError, chess.engine.EngineError) as e:
+            _worker_state["unavailable"] = str(e)
+            return None
+    return _worker_state["engine"]
+
+
+def _close_worker_engine():
+    engine = _worker_state.pop("engine", None)
+    if engine:
+        try:
+            engine.quit()
+        except Exception:
+            pass
+
+
+def analyse_position(engine, board, limit):
+    """Analyse board and return the JSON-ready part of a result record"""
+    info = engine.analyse(board, limit, game=object())
+    pv = info.get("pv", [])
+    record = {
+        "move": pv[0].uci() if pv else None,
+        "san": board.san(pv[0]) if pv else None,
+        "pv": [move.uci() for move in pv],
+        "depth": info.get("depth"),
+        "seldepth": info.get("seldepth"),
+        "nodes": info.get("nodes"),
+        "nps": info.get("nps"),
+        "time": info.get("time"),
+    }
+    score = info.get("score")
+    if score is not None:
+        relative = score.relative
+        record["score_cp"] = relative.score()
+        record["mate"] = relative.mate()
+    return record
+
+
+def _run_task(task):
+    settings = _worker_state["settings"]
+    record = {"file": task["file"], "line": task["line"]}
+    try:
+        board, operations = parse_position(task["text"])
+    except ValueError as e:
+        record["error"] = f"invalid position: {e}"
+        return record
+
+    record["fen"] = board.fen()
+    if "id" in operations:
+        record["id"] = operations["id"]
+
+    engine = _worker_engine()
+    if engine is None:
+        record["error"] = f"engine unavailable: {_worker_state['unavailable']}"
+        return record
+
+    started = time.time()
+    try:
+        record.update(analyse_position(engine, board, settings["limit"]))
+    except chess.engine.EngineTerminatedError as e:
+        # The engine died on this position; give the next one a fresh process
+        record["error"] = f"engine terminated: {e}"
+        _close_worker_engine()
+    except chess.engine.EngineError as e:
+        record["error"] = f"engine error: {e}"
+    record["duration"] = round(time.time() - started, 3)
+
+    # Test suites: did the engine find the best move / avoid the bad one?
+    if record.get("move") and ("bm" in operations or "am" in operations):
+        move = chess.Move.from_uci(record["move"])
+        record["solved"] = (
+            ("bm" not in operations or move in operations["bm"]) and
+            ("am" not in operations or move not in operations["am"])
+        )
+    return record
+
+
+def load_checkpoint(output_path):
+    """Return the (file, line) keys already in output_path
+
+    Positions that failed because of the engine are not counted, so a
+    resumed run retries them (their new record supersedes the old one).
+    A run killed mid-write can leave a partial last line; it is cut off so
+    the file stays valid JSONL when appending resumes.
+    """
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+
+    valid_size = 0
+    with open(output_path, 'rb') as f:
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                break
+            try:
+                record = json.loads(raw)
+            except ValueError:
+                break
+            if not record.get("error", "").startswith("engine"):
+                done.add((record["file"], record["line"]))
+            valid_size += len(raw)
+
+    if valid_size != os.path.getsize(output_path):
+        with open(output_path, 'r+b') as f:
+            f.truncate(valid_size)
+    return done
+
+
+def run_analysis(settings, tasks, concurrency, on_result):
+    """Analyse tasks across a pool of engine processes, calling on_result as they finish"""
+    with multiprocessing.Pool(concurrency, initializer=_init_worker, initargs=(settings,)) as pool:
+        for record in pool.imap_unordered(_run_task, tasks):
+            on_result(record)
+        pool.close()
+        pool.join()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="chessgui4.py analyse",
+        description="Analyse FEN/EPD positions across a pool of engine processes into resumable JSONL"
+    )
+    parser.add_argument("positions", nargs="+", help="FEN or EPD files, one position per line")
+    parser.add_argument("--engine", required=True, help="Path to the UCI engine, or tcp://host:port")
+    parser.add_argument("--option", action="append", default=[], help="UCI option as Name=Value")
+    parser.add_argument("--output", required=True, help="JSONL file; an existing file is resumed")
+    parser.add_argument("--concurrency", type=int, default=multiprocessing.cpu_count(), help="Number of engine processes")
+    parser.add_argument("--depth", type=int, help="Depth limit per position")
+    parser.add_argument("--nodes", type=int, help="Node limit per position")
+    parser.add_argument("--time", type=float, help="Time limit per position in seconds")
+    parser.add_argument("--checkpoint-every", type=int, default=100, help="fsync the output every N results")
+    args = parser.parse_args(argv)
+
+    if args.depth is None and args.nodes is None and args.time is None:
+        parser.error("give at least one of --depth, --nodes or --time")
+
+    settings = {
+        "engine": args.engine,
+        "options": parse_engine_options(args.option),
+        "limit": chess.engine.Limit(depth=args.depth, nodes=args.nodes, time=args.time),
+    }
+    try:
+        check_engines([settings["engine"]])
+    except (OSError, chess.engine.EngineError) as e:
+        print(f"Cannot start engine: {e}", file=sys.stderr)
+        return 1
+
+    done = load_checkpoint(args.output)
+    if done:
+        print(f"Resuming: {len(done)} positions already analysed", flush=True)
+
+    stats = {"analysed": 0, "errors": 0, "solved": 0, "tested": 0}
+    started = time.time()
+    output = open(args.output, 'a')
+
+    def on_result(record):
+        output.write(json.dumps(record) + "\n")
+        stats["analysed"] += 1
+        stats["errors"] += "error" in record
+        if "solved" in record:
+            stats["tested"] += 1
+            stats["solved"] += record["solved"]
+
+        # Lines are flushed as they come; fsync makes every N of them durable
+        output.flush()
+        if stats["analysed"] % args.checkpoint_every == 0:
+            os.fsync(output.fileno())
+            rate = stats["analysed"] / max(time.time() - started, 1e-9)
+            print(f"{stats['analysed']} positions ({rate:.1f}/s, {stats['errors']} errors)", flush=True)
+
+    try:
+        run_analysis(settings, iter_positions(args.positions, done), max(1, args.concurrency), on_result)
+    except KeyboardInterrupt:
+        print("Analysis interrupted; rerun the same command to resume", file=sys.stderr)
+        return 1
+    finally:
+        output.flush()
+        os.fsync(output.fileno())
+        output.close()
+
+    elapsed = time.time() - started
+    print(f"Analysed {stats['analysed']} positions in {elapsed:.1f}s ({stats['errors']} errors)")
+    if stats["tested"]:
+        print(f"Solved {stats['solved']}/{stats['tested']} test positions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,335 @@
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tkinter as tk
+
+import chess
+import chess.pgn
+
+import chessgui4
+
+
+MOCK_ENGINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_engine.py")
+BENCHMARKS = ("draw_board", "load_game", "square_click", "engine_round_trip")
+
+
+class ClickEvent:
+    """Stand-in for the Tk event on_square_clicked receives"""
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+
+def mock_engine_command(delay=0.0, info_lines=10):
+    return [sys.executable, MOCK_ENGINE, "--delay", str(delay), "--info-lines", str(info_lines)]
+
+
+def summarize(samples):
+    """Millisecond statistics for a list of durations in seconds"""
+    ordered = sorted(sample * 1000 for sample in samples)
+    if not ordered:
+        return {"runs": 0}
+    return {
+        "runs": len(ordered),
+        "min_ms": round(ordered[0], 4),
+        "median_ms": round(statistics.median(ordered), 4),
+        "mean_ms": round(statistics.fmean(ordered), 4),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 4),
+        "max_ms": round(ordered[-1], 4),
+    }
+
+
+def long_game(plies, seed=0):
+    """A deterministic random game of at least plies plies (queen promotions only)"""
+    for attempt in range(seed, seed + 1000):
+        rng = random.Random(attempt)
+        board = chess.Board()
+        while not board.is_game_over(claim_draw=False) and board.ply() < plies:
+            moves = [move for move in board.legal_moves if move.promotion in (None, chess.QUEEN)]
+            board.push(rng.choice(moves))
+        if board.ply() >= plies:
+            return board
+    raise RuntimeError(f"Could not generate a {plies}-ply game")
+
+
+def wait_until(root, condition, timeout=30.0):
+    """Run the Tk event loop until condition() holds"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise TimeoutError("Benchmark timed out waiting for the GUI")
+        root.update()
+        time.sleep(0.0005)
+
+
+def square_center(gui, square):
+    x = chess.square_file(square) * gui.square_size + gui.square_size // 2
+    y = (7 - chess.square_rank(square)) * gui.square_size + gui.square_size // 2
+    return ClickEvent(x, y)
+
+
+def bench_draw_board(gui, root, settings):
+    """Full canvas rebuilds and incremental redraws after single moves"""
+    game = long_game(settings["plies"])
+    moves = game.move_stack
+    gui.game_mode.set("player_vs_player")
+    gui.on_mode_change()
+
+    full = []
+    for _ in range(settings["iterations"]):
+        del gui.piece_items
+        started = time.perf_counter()
+        gui.draw_board()
+        root.update_idletasks()
+        full.append(time.perf_counter() - started)
+
+    incremental = []
+    gui.board.reset()
+    gui.draw_board()
+    for i in range(settings["iterations"]):
+        move = moves[i % len(moves)]
+        if i % len(moves) == 0:
+            gui.board.reset()
+            gui.draw_board()
+        gui.board.push(move)
+        started = time.perf_counter()
+        gui.draw_board()
+        root.update_idletasks()
+        incremental.append(time.perf_counter() - started)
+
+    gui.new_game()
+    return {
+        "draw_board_full": summarize(full),
+        "draw_board_move": summarize(incremental),
+    }
+
+
+def bench_load_game(gui, root, settings):
+    """load_game() replay of a long game from a UCI text file and from a PGN file"""
+    game = long_game(settings["plies"])
+    workdir = tempfile.mkdtemp(prefix="chessgui-bench-")
+    text_path = os.path.join(workdir, "game.txt")
+    pgn_path = os.path.join(workdir, "game.pgn")
+    with open(text_path, 'w') as f:
+        for move in game.move_stack:
+            f.write(move.uci() + "\n")
+    with open(pgn_path, 'w') as f:
+        f.write(str(chess.pgn.Game.from_board(game)) + "\n")
+
+    gui.game_mode.set("player_vs_player")
+    gui.on_mode_change()
+
+    # The file dialog and the "loaded" message box would block a headless run
+    askopenfilename = chessgui4.filedialog.askopenfilename
+    showinfo = chessgui4.messagebox.showinfo
+    chessgui4.messagebox.showinfo = lambda *args, **kwargs: None
+    results = {}
+    try:
+        for name, path in (("load_game_text", text_path), ("load_game_pgn", pgn_path)):
+            chessgui4.filedialog.askopenfilename = lambda *args, **kwargs: path
+            samples = []
+            for _ in range(max(1, settings["iterations"] // 10)):
+                gui.new_game()
+                root.update_idletasks()
+                started = time.perf_counter()
+                gui.load_game()
+                root.update_idletasks()
+                samples.append(time.perf_counter() - started)
+                if len(gui.board.move_stack) != len(game.move_stack):
+                    raise RuntimeError(f"{name} loaded {len(gui.board.move_stack)} of {len(game.move_stack)} plies")
+            results[name] = dict(summarize(samples), plies=len(game.move_stack))
+    finally:
+        chessgui4.filedialog.askopenfilename = askopenfilename
+        chessgui4.messagebox.showinfo = showinfo
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    gui.new_game()
+    return results
+
+
+def bench_square_click(gui, root, settings):
+    """on_square_clicked latency for selecting a piece and for completing a move"""
+    game = long_game(settings["plies"])
+    gui.game_mode.set("player_vs_player")
+    gui.on_mode_change()
+    gui.new_game()
+
+    select, move = [], []
+    while len(move) < settings["iterations"]:
+        gui.new_game()
+        for played in game.move_stack:
+            if len(move) >= settings["iterations"] or gui.outcome.is_game_over():
+                break
+            for square, samples in ((played.from_square, select), (played.to_square, move)):
+                started = time.perf_counter()
+                gui.on_square_clicked(square_center(gui, square))
+                root.update_idletasks()
+                samples.append(time.perf_counter() - started)
+            if gui.promotion_choices:
+                # A promotion waits for the piece to be picked; the picker click is not timed
+                choice = next(square for square, move in gui.promotion_choices.items() if move == played)
+                gui.on_square_clicked(square_center(gui, choice))
+                root.update_idletasks()
+            if gui.board.peek() != played:
+                raise RuntimeError(f"Click replay diverged at {played.uci()}")
+
+    gui.new_game()
+    return {
+        "square_click_select": summarize(select),
+        "square_click_move": summarize(move),
+    }
+
+
+def bench_engine_round_trip(gui, root, settings):
+    """Engine vs Engine plies against the mock engine, minus its fixed think time"""
+    delay = settings["engine_delay"]
+    gui.game_mode.set("engine_vs_engine")
+    gui.on_mode_change()
+    wait_until(root, lambda: gui.engine_white and gui.engine_black)
+    gui.new_game()
+
+    # Time every ply from one make_move to the next
+    moved_at = [time.perf_counter()]
+    make_move = gui.make_move
+
+    def timed_make_move(move):
+        moved_at.append(time.perf_counter())
+        return make_move(move)
+
+    gui.make_move = timed_make_move
+    plies = settings["engine_plies"]
+    try:
+        gui.toggle_engine_battle()
+        wait_until(root, lambda: len(gui.board.move_stack) >= plies or not gui.engine_battle_active,
+                   timeout=plies * (delay + 1.0) + 30)
+    finally:
+        del gui.make_move
+    if gui.engine_battle_active:
+        gui.toggle_engine_battle()
+    gui.stop_engine_search()
+
+    records = [record for record in gui.telemetry.records() if record.get("source") == "engine"]
+    return {
+        "engine_ply": summarize([later - earlier for earlier, later in zip(moved_at, moved_at[1:])]),
+        "engine_overhead": summarize([
+            (record["think_ms"] - delay * 1000) / 1000 for record in records if "think_ms" in record
+        ]),
+        "engine_queue_latency": summarize([
+            record["queue_ms"] / 1000 for record in records if "queue_ms" in record
+        ]),
+        "engine_make_move": summarize([
+            record["make_move_ms"] / 1000 for record in records if "make_move_ms" in record
+        ]),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(settings, selected=BENCHMARKS, visible=False):
+    """Run the selected benchmarks against one ChessGUI; returns the report dict"""
+    root = tk.Tk()
+    if not visible:
+        root.withdraw()
+    gui = chessgui4.ChessGUI(root, engine_path=mock_engine_command(settings["engine_delay"], settings["info_lines"]))
+    root.update()
+
+    benchmarks = {
+        "draw_board": bench_draw_board,
+        "load_game": bench_load_game,
+        "square_click": bench_square_click,
+        "engine_round_trip": bench_engine_round_trip,
+    }
+    results = {}
+    try:
+        for name in selected:
+            print(f"Running {name}...", file=sys.stderr, flush=True)
+            results.update(benchmarks[name](gui, root, settings))
+    finally:
+        gui.engine_pool.shutdown()
+        root.destroy()
+
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "tk": tk.TkVersion,
+        "chess": chess.__version__,
+        "settings": settings,
+        "results": results,
+    }
+
+
+def compare(report, baseline):
+    """Lines comparing median times with a baseline report"""
+    lines = []
+    for name, stats in report["results"].items():
+        old = baseline.get("results", {}).get(name)
+        if not old or not old.get("median_ms") or "median_ms" not in stats:
+            continue
+        ratio = stats["median_ms"] / old["median_ms"]
+        lines.append(f"{name:<24} {old['median_ms']:10.3f} -> {stats['median_ms']:10.3f} ms  ({ratio:5.2f}x)")
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="chessgui4.py bench",
+        description="Benchmark the GUI pipeline against a deterministic mock UCI engine"
+    )
+    parser.add_argument("--output", default="benchmark.json", help="JSON file to write the results to")
+    parser.add_argument("--baseline", help="Earlier results JSON to compare medians against")
+    parser.add_argument("--only", action="append", choices=BENCHMARKS, help="Run only this benchmark (repeatable)")
+    parser.add_argument("--iterations", type=int, default=200, help="Samples per micro-benchmark")
+    parser.add_argument("--plies", type=int, default=300, help="Length of the replayed game")
+    parser.add_argument("--engine-plies", type=int, default=60, help="Plies played in the engine round trip")
+    parser.add_argument("--engine-delay", type=float, default=0.01, help="Mock engine think time in seconds")
+    parser.add_argument("--info-lines", type=int, default=50, help="Info lines the mock engine sends per search")
+    parser.add_argument("--visible", action="store_true", help="Show the window (includes real paint costs)")
+    args = parser.parse_args(argv)
+
+    settings = {
+        "iterations": args.iterations,
+        "plies": args.plies,
+        "engine_plies": args.engine_plies,
+        "engine_delay": args.engine_delay,
+        "info_lines": args.info_lines,
+    }
+    report = run_benchmarks(settings, args.only or BENCHMARKS, args.visible)
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    for name, stats in report["results"].items():
+        if "median_ms" in stats:
+            print(f"{name:<24} median {stats['median_ms']:10.3f} ms  p95 {stats['p95_ms']:10.3f} ms  ({stats['runs']} runs)")
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        print(f"\nCompared with {args.baseline} ({baseline.get('commit') or 'unknown commit'}):")
+        for line in compare(report, baseline):
+            print(line)
+    print(f"Wrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
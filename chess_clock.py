@@ -0,0 +1,108 @@
+import re
+import time
+
+import chess
+import chess.engine
+
+
+def parse_time_control(text):
+    """Parse "300+5" or "40/300+0" (seconds) into (base, increment, moves_to_go)"""
+    match = re.fullmatch(r"(?:(\d+)/)?(\d+(?:\.\d+)?)(?:\+(\d+(?:\.\d+)?))?", text.strip())
+    if not match:
+        raise ValueError(f"Time control must look like 300+5 or 40/300: {text}")
+    moves_to_go, base, increment = match.groups()
+    return float(base), float(increment or 0), int(moves_to_go or 0)
+
+
+def format_time_control(base, increment=0.0, moves_to_go=0):
+    """PGN TimeControl tag for the given settings"""
+    text = f"{base:g}" + (f"+{increment:g}" if increment else "")
+    return f"{moves_to_go}/{text}" if moves_to_go else text
+
+
+def format_clock(seconds):
+    seconds = max(0.0, seconds)
+    if seconds < 10:
+        return f"{int(seconds // 60):02d}:{seconds % 60:04.1f}"
+    return f"{int(seconds // 60):02d}:{int(seconds % 60):02d}"
+
+
+class ChessClock:
+    """Two-sided game clock with base time, increment and moves-to-go
+
+    press(color) ends color's move: its elapsed time is charged, the increment
+    added, and the opponent's clock started. With moves_to_go, each side gets
+    the base time again after every moves_to_go of its own moves.
+    """
+
+    def __init__(self, base, increment=0.0, moves_to_go=0, timer=time.monotonic):
+        self.base = base
+        self.increment = increment
+        self.moves_to_go = moves_to_go
+        self.timer = timer
+        self.reset()
+
+    def reset(self):
+        self.remaining = {chess.WHITE: self.base, chess.BLACK: self.base}
+        self.moves_made = {chess.WHITE: 0, chess.BLACK: 0}
+        self.running = None
+        self.started_at = None
+
+    def start(self, color):
+        """Start (or switch to) color's clock"""
+        self.stop()
+        self.running = color
+        self.started_at = self.timer()
+
+    def stop(self):
+        """Stop the running clock and charge its elapsed time; returns it"""
+        if self.running is None:
+            return 0.0
+        elapsed = self.timer() - self.started_at
+        self.remaining[self.running] -= elapsed
+        self.running = None
+        self.started_at = None
+        return elapsed
+
+    def press(self, color):
+        """color has completed a move; returns the time that move took"""
+        elapsed = self.stop() if self.running == color else 0.0
+        self.remaining[color] += self.increment
+        self.moves_made[color] += 1
+        if self.moves_to_go and self.moves_made[color] % self.moves_to_go == 0:
+            self.remaining[color] += self.base
+        self.start(not color)
+        return elapsed
+
+    def time_left(self, color):
+        left = self.remaining[color]
+        if self.running == color:
+            left -= self.timer() - self.started_at
+        return left
+
+    def flagged(self, color):
+        return self.time_left(color) <= 0
+
+    def moves_until_control(self, color):
+        if not self.moves_to_go:
+            return None
+        return self.moves_to_go - self.moves_made[color] % self.moves_to_go
+
+    def limit(self, color_to_move):
+        """chess.engine.Limit describing both clocks for an engine search"""
+        return chess.engine.Limit(
+            white_clock=max(0.0, self.time_left(chess.WHITE)),
+            black_clock=max(0.0, self.time_left(chess.BLACK)),
+            white_inc=self.increment,
+            black_inc=self.increment,
+            remaining_moves=self.moves_until_control(color_to_move),
+        )
+
+    def flag_result(self, board):
+        """Result when the side to move on board has run out of time
+
+        The opponent only wins if it still has mating material.
+        """
+        if board.has_insufficient_material(not board.turn):
+            return "1/2-1/2"
+        return "0-1" if board.turn == chess.WHITE else "1-0"
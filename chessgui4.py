@@ -2,40 +2,121 @@ import chess
 import chess.engine
 import tkinter as tk
 from tkinter import messagebox, ttk, filedialog
-import threading
+import tkinter.font as tkfont
 import time
+import sys
+import os
+
+from chess_clock import ChessClock, format_clock, format_time_control
+from engine_pool import EnginePool
+import pgn_loader
+from game_archive import GameArchive
+from game_review import GameReview, white_cp
+from live_analysis import AnalysisFeed, format_score
+from move_index import LegalMoveIndex, PROMOTION_PIECES
+from move_tree import MoveTree
+from opening_book import OpeningBook
+from tablebase import EndgameTablebase
+from outcome_tracker import OutcomeTracker
+from position_cache import PositionCache
+from resource_scheduler import ResourceScheduler
+from telemetry import MoveTelemetry, instrumented
 
 class ChessGUI:
-    def __init__(self, root):
+    def __init__(self, root, engine_path=None):
         self.root = root
         self.root.title("Enhanced Python Chess GUI")
         self.root.configure(bg='#2c3e50')
         
         # Chess board and engines
         self.board = chess.Board()
+        self.outcome = OutcomeTracker(self.board)
+        
+        # Move tree: every line played stays reachable from the move history
+        self.snapshot_interval = 8  # plies between cached boards; a jump costs at most this many pushes
+        self.move_tree = MoveTree(self.board, self.snapshot_interval)
+        self.current_node = self.move_tree.game
+        self.line = []  # nodes shown in the move history: path to current_node plus its continuation
+        self.telemetry = MoveTelemetry()  # per-ply timings, see show_stats_window
         self.engine_white = None
         self.engine_black = None
         # self.engine_path = "komodo"  # Update this to your Komodo engine path
-        self.engine_path = "stockfish"  # Update this to your stockfish engine path
+        self.engine_path = engine_path or "stockfish"  # Update this to your stockfish engine path (or tcp://host:port of an engine server)
         self.engine_thinking = False
         self.engine_time_limit = 2.0  # seconds
         self.engine_battle_active = False
+        self.engine_idle_timeout = 300.0  # seconds before an unused engine process is shut down
+        self.engine_grace = 2.0  # seconds past a move's time limit before the engine counts as hung and is restarted
+        self.engine_pool = EnginePool(self.engine_path, idle_timeout=self.engine_idle_timeout, grace=self.engine_grace)
+        
+        # Threads/Hash per engine from the cores and memory available, so engines
+        # searching at the same time never oversubscribe the machine
+        self.engine_pinning = False  # also pin engines to disjoint CPU sets (Linux)
+        self.engine_large_hash = False  # also split half the free memory (up to 4 GB each) between engines as Hash
+        self.scheduler = ResourceScheduler(pin=self.engine_pinning, hash_fraction=0.5 if self.engine_large_hash else 0)
+        self.archive_path = None  # e.g. "games.cga" to append every finished engine battle
+        
+        # Polyglot opening book, probed before every engine search
+        self.book_path = None  # e.g. "book.bin"
+        self.book_selection = "weighted"  # weighted, random or best
+        self.book_max_depth = 20  # plies
+        self.opening_book = OpeningBook(self.book_path, self.book_selection, self.book_max_depth) if self.book_path else None
+        
+        # Syzygy tablebases: solved endgames are played instantly
+        self.syzygy_path = None  # e.g. "/path/to/syzygy" with .rtbw/.rtbz files
+        self.tablebase = EndgameTablebase(self.syzygy_path) if self.syzygy_path else None
+        
+        # Position cache: results at least cache_min_depth deep are replayed without searching
+        self.cache_path = None  # e.g. "positions.sqlite" to share results across sessions
+        self.cache_min_depth = 18
+        self.position_cache = PositionCache(max_entries=200000, path=self.cache_path)
+        
+        # Live analysis: info lines are buffered and shown at a fixed rate
+        self.analysis_engine = None
+        self.analysis_feed = AnalysisFeed(capacity=256)
+        self.analysis_interval = 100  # ms between display updates (10 Hz)
+        self.analysis_after_id = None
+        self.analysis_request = 0
+        
+        # Game review: every position analysed in parallel on several engine processes
+        self.review = None
+        self.review_engines = max(1, min(8, os.cpu_count() or 1))
+        self.review_time_limit = 1.0  # seconds per position
+        self.review_graph_pending = False
         
         # Enhanced visual settings
-        self.board_size = 480
+        self.board_size = 480  # initial size; the board follows the window from there
         self.square_size = self.board_size // 8
+        self.min_square_size = 24
+        self.resize_delay = 150  # ms without <Configure> events before the board is rebuilt
+        self.resize_after_id = None
+        self.board_fonts = {}  # (size, weight) -> tkfont.Font, shared by every canvas item
         self.light_square_color = "#f0d9b5"
         self.dark_square_color = "#b58863"
         self.highlight_color = "#ffff00"
         self.last_move_color = "#90ee90"
         self.selected_color = "#87ceeb"
+        self.hint_color = "#2c3e50"  # dots/rings on the squares the selected piece can reach
+        
+        # Human input: legal moves indexed once per position, drag-and-drop, promotion picker
+        self.move_index = None
+        self.drag = None
+        self.drag_after_id = None
+        self.drag_interval = 16  # ms between piece moves while dragging (~60 Hz)
+        self.drag_threshold = 4  # pixels the pointer must travel before a press becomes a drag
+        self.promotion_choices = None
         
         # GUI elements
         self.create_widgets()
         self.draw_board()
         
-        # Start engines in separate threads
+        # Game clocks (off until enabled in the control panel)
+        self.reset_clock()
+        self.root.after(100, self.update_clocks)
+        
+        # Engines are spawned lazily for the modes that need them
         self.start_engines()
+        self.root.after(10000, self.check_idle_engines)
 
     def create_widgets(self):
         # Configure window style
@@ -66,14 +147,20 @@ class ChessGUI:
         self.move_list = tk.Listbox(
             self.move_list_frame, 
             height=25,
-            width=20,
+            width=28,
             font=("Consolas", 10),
             bg='#ecf0f1',
             fg='#2c3e50',
             selectbackground='#3498db',
+            exportselection=False,
             relief=tk.FLAT,
             bd=1
         )
+        self.move_list.bind("<<ListboxSelect>>", self.on_move_list_select)
+        
+        # Keyboard navigation through the game
+        for key in ("<Left>", "<Right>", "<Home>", "<End>", "<Up>", "<Down>"):
+            self.root.bind(key, self.on_navigation_key)
         
         self.move_scrollbar = tk.Scrollbar(self.move_list_frame, orient=tk.VERTICAL)
         self.move_list.config(yscrollcommand=self.move_scrollbar.set)
@@ -82,6 +169,16 @@ class ChessGUI:
         self.move_list.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         self.move_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
+        # Evaluation graph, filled in by Review Game
+        self.eval_graph = tk.Canvas(
+            self.history_frame,
+            height=70,
+            width=200,
+            bg='#2c3e50',
+            highlightthickness=0
+        )
+        self.eval_graph.pack(fill=tk.X, padx=5, pady=(0, 5))
+        
         # Save/Load buttons frame
         self.save_load_frame = tk.Frame(self.history_frame, bg='#34495e')
         self.save_load_frame.pack(fill=tk.X, padx=5, pady=(5, 10))
@@ -120,7 +217,7 @@ class ChessGUI:
         
         # Middle - Chess board
         self.board_frame = tk.Frame(self.main_frame, bg='#34495e', relief=tk.RAISED, bd=3)
-        self.board_frame.pack(side=tk.LEFT, padx=10)
+        self.board_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=10)
         
         # Board title
         self.board_title = tk.Label(
@@ -134,16 +231,20 @@ class ChessGUI:
         
         # Chess board canvas with border
         self.canvas_frame = tk.Frame(self.board_frame, bg='#2c3e50', bd=2, relief=tk.SUNKEN)
-        self.canvas_frame.pack(padx=10, pady=10)
+        self.canvas_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
         self.canvas = tk.Canvas(
             self.canvas_frame, 
             width=self.board_size, 
             height=self.board_size,
+            bg='#2c3e50',
             highlightthickness=0
         )
-        self.canvas.pack()
+        self.canvas.pack(fill=tk.BOTH, expand=True)
         self.canvas.bind("<Button-1>", self.on_square_clicked)
+        self.canvas.bind("<B1-Motion>", self.on_drag)
+        self.canvas.bind("<ButtonRelease-1>", self.on_drop)
+        self.canvas.bind("<Configure>", self.on_canvas_configure)
         
         # Right side - Control panel
         self.control_frame = tk.Frame(self.main_frame, bg='#34495e', relief=tk.RAISED, bd=3)
@@ -224,6 +325,28 @@ class ChessGUI:
         )
         self.battle_btn.pack(fill=tk.X, pady=2)
         
+        self.stats_btn = tk.Button(
+            self.button_frame, 
+            text="📊 Performance Stats", 
+            command=self.show_stats_window,
+            bg='#7f8c8d',
+            fg='white',
+            activebackground='#95a5a6',
+            **button_style
+        )
+        self.stats_btn.pack(fill=tk.X, pady=2)
+        
+        self.review_btn = tk.Button(
+            self.button_frame, 
+            text="🔍 Review Game", 
+            command=self.review_game,
+            bg='#16a085',
+            fg='white',
+            activebackground='#1abc9c',
+            **button_style
+        )
+        self.review_btn.pack(fill=tk.X, pady=2)
+        
         # Engine settings with improved layout
         self.engine_settings_frame = tk.LabelFrame(
             self.control_frame, 
@@ -262,6 +385,32 @@ class ChessGUI:
         )
         self.time_limit_spin.pack(side=tk.RIGHT)
         
+        # Pondering (Player vs Engine only)
+        self.ponder_enabled = tk.BooleanVar(value=True)
+        tk.Checkbutton(
+            self.engine_settings_frame,
+            text="Ponder on player's time",
+            variable=self.ponder_enabled,
+            bg='#34495e',
+            fg='#ecf0f1',
+            selectcolor='#2c3e50',
+            font=("Arial", 9),
+            command=self.on_ponder_change
+        ).pack(anchor=tk.W, padx=10)
+        
+        # Ponder-fair battles: both engines ponder, each on its own share of the cores
+        self.ponder_fair = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            self.engine_settings_frame,
+            text="Ponder-fair battles (split cores)",
+            variable=self.ponder_fair,
+            bg='#34495e',
+            fg='#ecf0f1',
+            selectcolor='#2c3e50',
+            font=("Arial", 9),
+            command=self.on_ponder_change
+        ).pack(anchor=tk.W, padx=10)
+        
         # Game mode selection
         self.mode_frame = tk.Frame(self.engine_settings_frame, bg='#34495e')
         self.mode_frame.pack(fill=tk.X, padx=10, pady=5)
@@ -329,99 +478,517 @@ class ChessGUI:
             font=("Arial", 8)
         )
         self.level_slider.pack(fill=tk.X)
+        
+        # Game clocks
+        self.clock_frame = tk.LabelFrame(
+            self.control_frame, 
+            text="Clocks", 
+            font=("Arial", 10, "bold"),
+            bg='#34495e',
+            fg='#ecf0f1',
+            relief=tk.GROOVE,
+            bd=2
+        )
+        self.clock_frame.pack(fill=tk.X, padx=15, pady=5)
+        
+        self.clock_labels = {}
+        for color in (chess.BLACK, chess.WHITE):
+            label = tk.Label(
+                self.clock_frame,
+                font=("Courier", 12, "bold"),
+                bg='#2c3e50',
+                fg='#ecf0f1',
+                anchor=tk.W,
+                padx=8
+            )
+            label.pack(fill=tk.X, padx=10, pady=2)
+            self.clock_labels[color] = label
+        
+        self.clock_enabled = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            self.clock_frame,
+            text="Play with clocks",
+            variable=self.clock_enabled,
+            bg='#34495e',
+            fg='#ecf0f1',
+            selectcolor='#2c3e50',
+            font=("Arial", 9),
+            command=self.reset_clock
+        ).pack(anchor=tk.W, padx=10)
+        
+        # Changes take effect on the next new game (or when clocks are switched on)
+        self.clock_base = tk.DoubleVar(value=5.0)
+        self.clock_increment = tk.DoubleVar(value=3.0)
+        self.clock_moves_to_go = tk.IntVar(value=0)
+        for text, variable, low, high, step in (
+            ("Base (min):", self.clock_base, 0.5, 180, 0.5),
+            ("Increment (s):", self.clock_increment, 0, 60, 1),
+            ("Moves per control:", self.clock_moves_to_go, 0, 100, 1),
+        ):
+            row = tk.Frame(self.clock_frame, bg='#34495e')
+            row.pack(fill=tk.X, padx=10, pady=2)
+            tk.Label(
+                row, 
+                text=text, 
+                bg='#34495e', 
+                fg='#ecf0f1',
+                font=("Arial", 9)
+            ).pack(side=tk.LEFT)
+            tk.Spinbox(
+                row, 
+                from_=low, 
+                to=high, 
+                increment=step,
+                textvariable=variable, 
+                width=8,
+                font=("Arial", 9),
+                relief=tk.SUNKEN,
+                bd=1
+            ).pack(side=tk.RIGHT)
+        
+        # Live analysis
+        self.analysis_frame = tk.LabelFrame(
+            self.control_frame, 
+            text="Analysis", 
+            font=("Arial", 10, "bold"),
+            bg='#34495e',
+            fg='#ecf0f1',
+            relief=tk.GROOVE,
+            bd=2
+        )
+        self.analysis_frame.pack(fill=tk.X, padx=15, pady=5)
+        
+        self.analysis_options_frame = tk.Frame(self.analysis_frame, bg='#34495e')
+        self.analysis_options_frame.pack(fill=tk.X, padx=10, pady=2)
+        
+        self.analysis_enabled = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            self.analysis_options_frame,
+            text="Analyse position",
+            variable=self.analysis_enabled,
+            bg='#34495e',
+            fg='#ecf0f1',
+            selectcolor='#2c3e50',
+            font=("Arial", 9),
+            command=self.on_analysis_change
+        ).pack(side=tk.LEFT)
+        
+        self.analysis_multipv = tk.IntVar(value=3)
+        tk.Spinbox(
+            self.analysis_options_frame, 
+            from_=1, 
+            to=5, 
+            textvariable=self.analysis_multipv, 
+            width=3,
+            font=("Arial", 9),
+            relief=tk.SUNKEN,
+            bd=1,
+            command=self.restart_analysis
+        ).pack(side=tk.RIGHT)
+        tk.Label(
+            self.analysis_options_frame, 
+            text="Lines:", 
+            bg='#34495e', 
+            fg='#ecf0f1',
+            font=("Arial", 9)
+        ).pack(side=tk.RIGHT)
+        
+        self.analysis_stats = tk.Label(
+            self.analysis_frame,
+            text="Analysis: off",
+            bg='#34495e',
+            fg='#ecf0f1',
+            font=("Arial", 9),
+            anchor=tk.W
+        )
+        self.analysis_stats.pack(fill=tk.X, padx=10)
+        
+        self.analysis_text = tk.Text(
+            self.analysis_frame,
+            height=5,
+            width=36,
+            font=("Consolas", 9),
+            bg='#ecf0f1',
+            fg='#2c3e50',
+            relief=tk.FLAT,
+            wrap=tk.NONE,
+            state=tk.DISABLED
+        )
+        self.analysis_text.pack(fill=tk.X, padx=10, pady=(2, 8))
 
     def save_game(self):
-        """Save the current game to a text file"""
+        """Save the current game to a text file or append it to a game archive"""
         file_path = filedialog.asksaveasfilename(
             defaultextension=".txt",
-            filetypes=[("Text files", "*.txt"), ("All files", "*.*")],
+            filetypes=[("Text files", "*.txt"), ("Game archives", "*.cga"), ("All files", "*.*")],
             title="Save Game"
         )
         
         if not file_path:
             return
-            
+        
         try:
-            with open(file_path, 'w') as f:
-                # Save the move history
-                for move in self.board.move_stack:
-                    f.write(f"{move.uci()}\n")
+            if file_path.lower().endswith(".cga"):
+                with GameArchive(file_path) as archive:
+                    archive.append_board(self.line_board(), self.game_headers())
+            else:
+                with open(file_path, 'w') as f:
+                    # Save the move history (the whole line shown, not just up to the current move)
+                    for node in self.line:
+                        f.write(f"{node.move.uci()}\n")
             messagebox.showinfo("Success", "Game saved successfully!")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save game: {str(e)}")
 
+    def game_headers(self):
+        """Headers describing the current game and engine settings"""
+        mode = self.game_mode.get()
+        
+        def engine_name(engine):
+            return engine.engine_id if engine else "Engine"
+        
+        white = engine_name(self.engine_white) if mode == "engine_vs_engine" else "Player"
+        black = engine_name(self.engine_black) if mode != "player_vs_player" else "Player"
+        return {
+            "Event": "Engine Battle" if mode == "engine_vs_engine" else "Casual Game",
+            "Date": time.strftime("%Y.%m.%d"),
+            "White": white,
+            "Black": black,
+            "Result": self.outcome.result(),
+            "TimeControl": (
+                format_time_control(self.clock.base, self.clock.increment, self.clock.moves_to_go)
+                if self.clock else f"{self.time_limit.get()}s/move"
+            ),
+            "SkillLevel": self.engine_level.get(),
+        }
+
+    def archive_finished_game(self):
+        """Append a finished engine battle to archive_path, if configured"""
+        if not self.archive_path:
+            return
+        try:
+            with GameArchive(self.archive_path) as archive:
+                archive.append_board(self.board, self.game_headers())
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to archive game: {str(e)}")
+
     def load_game(self):
-        """Load a game from a text file"""
+        """Load a game from a PGN database or a UCI text file"""
         file_path = filedialog.askopenfilename(
-            filetypes=[("Text files", "*.txt"), ("All files", "*.*")],
+            filetypes=[
+                ("Game files", "*.pgn *.cga *.txt"),
+                ("PGN files", "*.pgn"),
+                ("Game archives", "*.cga"),
+                ("Text files", "*.txt"),
+                ("All files", "*.*")
+            ],
             title="Load Game"
         )
         
         if not file_path:
             return
-            
+        
+        if file_path.lower().endswith(".pgn"):
+            self.show_pgn_picker(file_path)
+            return
+        if file_path.lower().endswith(".cga"):
+            self.show_archive_picker(file_path)
+            return
+        
+        board = chess.Board()
+        move_uci = None
         try:
-            with open(file_path, 'r') as f:
-                moves = [line.strip() for line in f.readlines() if line.strip()]
-                
-            # Reset the board
-            self.board.reset()
-            self.move_list.delete(0, tk.END)
-            if hasattr(self, 'selected_square'):
-                delattr(self, 'selected_square')
-            
-            # Replay all moves
-            for move_uci in moves:
-                try:
-                    move = chess.Move.from_uci(move_uci)
-                    if move in self.board.legal_moves:
-                        self.board.push(move)
-                        self.update_move_list()
-                    else:
-                        raise ValueError(f"Illegal move: {move_uci}")
-                except Exception as e:
-                    messagebox.showerror("Error", f"Failed to load move {move_uci}: {str(e)}")
-                    return
-                    
-            self.draw_board()
-            messagebox.showinfo("Success", "Game loaded successfully!")
-            
-            # If in engine mode and it's engine's turn
-            if (self.game_mode.get() == "player_vs_engine" and
-                not self.board.is_game_over() and
-                self.board.turn == chess.BLACK):
-                self.engine_move()
-                
+            # Replay all moves, streaming the file line by line
+            for move_uci in pgn_loader.iter_uci_moves(file_path):
+                board.push_uci(move_uci)
+        except ValueError as e:
+            messagebox.showerror("Error", f"Failed to load move {move_uci}: {str(e)}")
+            return
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load game: {str(e)}")
+            return
+        
+        self.set_loaded_game(board)
+
+    def show_pgn_picker(self, file_path):
+        """Index a PGN file lazily (headers only) and let the user pick a game"""
+        def open_game(offset):
+            headers, board, moves = pgn_loader.read_game_at(file_path, offset)
+            for move in moves:
+                board.push(move)
+            return board
+        
+        entries = (
+            (offset, pgn_loader.describe_game(number, headers))
+            for number, (offset, headers) in enumerate(pgn_loader.iter_pgn_index(file_path), 1)
+        )
+        self.show_game_picker(entries, open_game)
+
+    def show_archive_picker(self, file_path):
+        """List the games of a binary archive; any game opens in O(1)"""
+        try:
+            archive = GameArchive(file_path)
+            count = len(archive)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Error", f"Failed to open archive: {str(e)}")
+            return
+        
+        entries = (
+            (number, pgn_loader.describe_game(number + 1, archive.headers(number)))
+            for number in range(count)
+        )
+        self.show_game_picker(entries, archive.board_at, on_close=archive.close)
+
+    def show_game_picker(self, entries, open_game, on_close=None):
+        """Let the user pick one of entries, an iterator of (key, description); open_game(key) returns a board
+        
+        on_close() is called once the picker window is gone.
+        """
+        keys = []
+
+        picker = tk.Toplevel(self.root)
+        picker.title("Select Game")
+        picker.configure(bg='#34495e')
+        picker.geometry("520x400")
+        
+        status = tk.Label(picker, text="Indexing...", bg='#34495e', fg='#ecf0f1', font=("Arial", 9))
+        status.pack(fill=tk.X, padx=10, pady=(10, 5))
+        
+        list_frame = tk.Frame(picker, bg='#34495e')
+        list_frame.pack(fill=tk.BOTH, expand=True, padx=10)
+        games = tk.Listbox(list_frame, font=("Consolas", 10), bg='#ecf0f1', fg='#2c3e50',
+                           selectbackground='#3498db', relief=tk.FLAT, bd=1)
+        scrollbar = tk.Scrollbar(list_frame, orient=tk.VERTICAL, command=games.yview)
+        games.config(yscrollcommand=scrollbar.set)
+        games.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        def open_selected(event=None):
+            selection = games.curselection()
+            if not selection:
+                return
+            try:
+                board = open_game(keys[selection[0]])
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to load game: {str(e)}")
+                return
+            picker.destroy()
+            self.set_loaded_game(board)
+        
+        def index_chunk():
+            # Headers only, a few hundred games per Tk tick, one insert per chunk
+            if not picker.winfo_exists():
+                return
+            rows = []
+            for key, description in entries:
+                keys.append(key)
+                rows.append(description)
+                if len(rows) >= 500:
+                    break
+            if rows:
+                games.insert(tk.END, *rows)
+            
+            if len(rows) >= 500:
+                status.config(text=f"Indexing... {len(keys)} games")
+                picker.after(1, index_chunk)
+            elif len(keys) == 1:
+                games.selection_set(0)
+                open_selected()
+            else:
+                status.config(text=f"{len(keys)} games")
+        
+        def closed(event):
+            # <Destroy> is also delivered for every child widget
+            if event.widget is picker:
+                on_close()
+        
+        games.bind("<Double-Button-1>", open_selected)
+        if on_close:
+            picker.bind("<Destroy>", closed)
+        tk.Button(
+            picker,
+            text="📂 Open Game",
+            command=open_selected,
+            font=("Arial", 10, "bold"),
+            bg='#2ecc71',
+            fg='white',
+            activebackground='#27ae60',
+            relief=tk.RAISED,
+            bd=2,
+            cursor='hand2'
+        ).pack(pady=10)
+        
+        index_chunk()
+
+    def set_loaded_game(self, board):
+        """Replace the current game with a fully replayed board"""
+        self.stop_engine_search()
+        self.cancel_review()
+        self.engine_pool.new_game()
+        self.current_node = self.move_tree.reset(board)
+        self.board = board
+        self.outcome.reset(board, self.move_tree.keys(self.current_node))
+        self.telemetry.reset()
+        self.reset_clock()
+        self.clear_selection()
+        self.set_line(self.current_node)
+        self.draw_board()
+        self.restart_analysis()
+        messagebox.showinfo("Success", "Game loaded successfully!")
+        
+        # If in engine mode and it's engine's turn
+        if (self.game_mode.get() == "player_vs_engine" and
+            not self.outcome.is_game_over() and
+            self.board.turn == chess.BLACK):
+            self.engine_move()
 
     def on_mode_change(self):
         """Handle changes in game mode"""
         if self.engine_battle_active:
             self.toggle_engine_battle()
+        self.stop_engine_search()
         
         if self.game_mode.get() == "engine_vs_engine":
             self.battle_btn.config(state=tk.NORMAL)
         else:
             self.battle_btn.config(state=tk.DISABLED)
-            
+        
+        # Warm whatever the new mode needs (nothing for Player vs Player)
+        self.start_engines()
+        self.restart_analysis()
+        
         if (self.game_mode.get() == "player_vs_engine" and 
             self.engine_black and not self.engine_thinking and
             self.board.turn == chess.BLACK):
             self.engine_move()
 
+    def on_analysis_change(self):
+        """Start or stop live analysis of the displayed position"""
+        if self.analysis_enabled.get():
+            self.restart_analysis()
+            if self.analysis_after_id is None:
+                self.analysis_after_id = self.root.after(self.analysis_interval, self.update_analysis)
+        else:
+            self.stop_analysis()
+            self.analysis_stats.config(text="Analysis: off")
+
+    def restart_analysis(self):
+        """Analyse the current position from scratch (called whenever the board changes)"""
+        if not self.analysis_enabled.get():
+            return
+        # Stop right away: the engine may be needed for play before the new analysis starts
+        self.stop_analysis()
+        if self.outcome.is_game_over():
+            self.analysis_stats.config(text="Analysis: game over")
+            return
+        
+        # Analysis gets its own process, after the ones the current mode plays with.
+        # Only the latest request starts a search when moves are stepped through quickly.
+        self.analysis_request += 1
+        request = self.analysis_request
+        self.engine_pool.acquire(
+            self.engines_needed() + 1,
+            lambda services: self.root.after(0, self.on_analysis_engine_ready, services[-1], request),
+            lambda error: self.root.after(0, self.on_analysis_error, str(error))
+        )
+
+    def on_analysis_engine_ready(self, engine, request):
+        if (request != self.analysis_request or not self.analysis_enabled.get() or
+            self.outcome.is_game_over()):
+            return
+        if self.analysis_engine and self.analysis_engine is not engine:
+            self.analysis_engine.stop()
+        self.analysis_engine = engine
+        self.schedule_engines()
+        
+        # A new generation makes the feed drop lines from the previous position
+        engine.stop()
+        self.analysis_feed.reset(engine.generation, self.board)
+        engine.analyse(
+            self.board,
+            multipv=self.analysis_multipv.get(),
+            on_info=self.analysis_feed.push,
+            on_error=lambda error, generation: self.root.after(0, self.on_analysis_error, str(error))
+        )
+
+    def on_analysis_error(self, error):
+        self.analysis_engine = None
+        self.analysis_stats.config(text=f"Analysis error: {error}")
+
+    def stop_analysis(self):
+        if self.analysis_engine:
+            self.analysis_engine.stop()
+            self.analysis_engine = None
+        self.analysis_feed.reset()
+        self.show_analysis([])
+
+    def update_analysis(self):
+        """Show the newest analysis lines every analysis_interval ms, however fast they arrive"""
+        if not self.analysis_enabled.get():
+            self.analysis_after_id = None
+            return
+        if self.analysis_feed.drain():
+            self.analysis_stats.config(text=self.analysis_feed.format_stats())
+            self.show_analysis(self.analysis_feed.format_lines())
+        self.analysis_after_id = self.root.after(self.analysis_interval, self.update_analysis)
+
+    def show_analysis(self, lines):
+        self.analysis_text.config(state=tk.NORMAL)
+        self.analysis_text.delete("1.0", tk.END)
+        self.analysis_text.insert(tk.END, "\n".join(lines))
+        self.analysis_text.config(state=tk.DISABLED)
+
+    def pondering(self):
+        """Whether engines keep searching on their opponent's time in the current mode"""
+        mode = self.game_mode.get()
+        return ((mode == "player_vs_engine" and self.ponder_enabled.get()) or
+                (mode == "engine_vs_engine" and self.ponder_fair.get()))
+
+    def on_ponder_change(self):
+        """Stop running ponder searches as soon as pondering is switched off"""
+        if not self.pondering():
+            self.stop_pondering()
+
+    def stop_pondering(self):
+        for engine in (self.engine_white, self.engine_black):
+            if engine and engine.ponder_move:
+                engine.stop()
+
+    def schedule_engines(self):
+        """Hand out Threads/Hash (and CPU sets) to the engines the current mode uses"""
+        # Engines in one slot take turns; different slots search at the same time
+        slots = []
+        mode = self.game_mode.get()
+        if mode == "engine_vs_engine" and self.engine_white and self.engine_black:
+            if self.ponder_fair.get():
+                slots = [[self.engine_white], [self.engine_black]]
+            else:
+                slots = [[self.engine_white, self.engine_black]]
+        elif mode == "player_vs_engine" and self.engine_black:
+            slots = [[self.engine_black]]
+        if self.analysis_enabled.get() and self.analysis_engine:
+            slots.append([self.analysis_engine])
+        
+        # Idle processes in the pool still hold their hash tables
+        processes = max(sum(len(slot) for slot in slots), len(self.engine_pool.services))
+        for assignment, slot in zip(self.scheduler.plan(len(slots), processes), slots):
+            for engine in slot:
+                engine.set_resources(assignment["options"], assignment["cpus"])
+
     def toggle_engine_battle(self):
         """Start or stop the engine vs engine battle"""
         if not self.engine_battle_active:
             # Start the battle
             if not (self.engine_white and self.engine_black):
-                messagebox.showerror("Error", "Engines not ready")
-                return
-                
+                # Spawned on demand; on_engines_ready starts the battle
+                self.start_engines()
+            
             self.engine_battle_active = True
             self.battle_btn.config(text="⏸ Pause Engine Battle")
             self.new_game_btn.config(state=tk.DISABLED)
             self.undo_btn.config(state=tk.DISABLED)
+            if self.clock and self.board.move_stack and not self.outcome.is_game_over():
+                self.clock.start(self.board.turn)
             
             # Start the first move if it's white's turn
             if self.board.turn == chess.WHITE:
@@ -429,14 +996,25 @@ class ChessGUI:
         else:
             # Stop the battle
             self.engine_battle_active = False
+            self.stop_pondering()
+            if self.clock:
+                self.clock.stop()
             self.battle_btn.config(text="▶ Start Engine Battle")
             self.new_game_btn.config(state=tk.NORMAL)
             self.undo_btn.config(state=tk.NORMAL)
 
-    def draw_board(self):
+    def create_board_items(self):
+        """Create the persistent canvas items once; draw_board only updates them"""
         self.canvas.delete("all")
-        
-        # Draw squares with improved colors
+        self.square_items = {}
+        self.piece_items = {}
+        self.drawn_pieces = {}
+        self.drawn_highlights = {}
+        self.drawn_hints = {}
+        self.drag = None
+        self.promotion_choices = None
+        
+        # Squares
         for row in range(8):
             for col in range(8):
                 x1 = col * self.square_size
@@ -445,71 +1023,169 @@ class ChessGUI:
                 y2 = y1 + self.square_size
                 
                 color = self.light_square_color if (row + col) % 2 == 0 else self.dark_square_color
-                self.canvas.create_rectangle(
+                self.square_items[chess.square(col, row)] = self.canvas.create_rectangle(
                     x1, y1, x2, y2, 
                     fill=color, 
                     outline='#8b4513', 
                     width=1,
                     tags=f"square_{row}_{col}"
                 )
-                
-                # Draw enhanced pieces
-                piece = self.board.piece_at(chess.square(col, row))
-                if piece:
-                    piece_symbol = self.get_enhanced_piece_symbol(piece)
-                    text_color = '#1a1a1a' if piece.color == chess.WHITE else '#8b0000'
-                    shadow_color = '#d3d3d3' if piece.color == chess.WHITE else '#4d0000'
-                    
-                    # Draw shadow for depth effect
-                    self.canvas.create_text(
-                        x1 + self.square_size // 2 + 1, 
-                        y1 + self.square_size // 2 + 1,
-                        text=piece_symbol, 
-                        font=("Arial", 32, "bold"),
-                        fill=shadow_color,
-                        tags=f"piece_shadow_{row}_{col}"
-                    )
-                    
-                    # Draw main piece
-                    self.canvas.create_text(
-                        x1 + self.square_size // 2, 
-                        y1 + self.square_size // 2,
-                        text=piece_symbol, 
-                        font=("Arial", 32, "bold"),
-                        fill=text_color,
-                        tags=f"piece_{row}_{col}"
-                    )
         
-        # Highlight last move with better colors
-        if self.board.move_stack:
-            last_move = self.board.peek()
-            self.highlight_square(last_move.from_square, self.last_move_color)
-            self.highlight_square(last_move.to_square, self.last_move_color)
+        # Piece slots (shadow + main text), hidden until a piece stands there
+        self.piece_font = self.board_font(max(8, self.square_size * 8 // 15))
+        for row in range(8):
+            for col in range(8):
+                cx = col * self.square_size + self.square_size // 2
+                cy = (7 - row) * self.square_size + self.square_size // 2
+                
+                # Shadow for depth effect
+                shadow = self.canvas.create_text(
+                    cx + 1, cy + 1,
+                    text="",
+                    font=self.piece_font,
+                    state=tk.HIDDEN,
+                    tags=f"piece_shadow_{row}_{col}"
+                )
+                piece = self.canvas.create_text(
+                    cx, cy,
+                    text="",
+                    font=self.piece_font,
+                    state=tk.HIDDEN,
+                    tags=f"piece_{row}_{col}"
+                )
+                self.piece_items[chess.square(col, row)] = (shadow, piece)
+                self.drawn_pieces[chess.square(col, row)] = None
+        
+        # Move hints: a dot on empty target squares, a ring around capturable pieces
+        self.hint_items = {}
+        for square in chess.SQUARES:
+            self.hint_items[square] = self.canvas.create_oval(0, 0, 0, 0, state=tk.HIDDEN, tags="hint")
+        
+        # Highlight frames drawn over the pieces, moved around with coords()
+        self.highlight_items = {}
+        for name in ("last_from", "last_to", "selected"):
+            self.highlight_items[name] = self.canvas.create_rectangle(
+                0, 0, 0, 0,
+                outline=self.highlight_color,
+                width=4,
+                state=tk.HIDDEN,
+                tags=f"highlight_{name}"
+            )
+            self.drawn_highlights[name] = None
         
-        # Highlight selected square
-        if hasattr(self, 'selected_square'):
-            self.highlight_square(self.selected_square, self.selected_color)
+        # The piece being dragged: the only item that moves with the pointer
+        self.drag_item = self.canvas.create_text(0, 0, text="", font=self.piece_font, state=tk.HIDDEN, tags="drag")
         
-        # Draw coordinates with better styling
+        # Coordinates
+        coordinate_font = self.board_font(max(6, self.square_size // 5))
+        margin = max(6, self.square_size // 6)
         for i in range(8):
             # Files (a-h)
             self.canvas.create_text(
                 (i + 0.5) * self.square_size, 
-                self.board_size - 10,
+                self.board_size - margin,
                 text=chr(97 + i), 
-                font=("Arial", 12, "bold"),
-                fill='#2c3e50'
+                font=coordinate_font,
+                fill='#2c3e50',
+                tags="coordinate"
             )
             
             # Ranks (1-8)
             self.canvas.create_text(
-                10, 
+                margin, 
                 (7 - i + 0.5) * self.square_size,
                 text=str(i + 1), 
-                font=("Arial", 12, "bold"),
-                fill='#2c3e50'
+                font=coordinate_font,
+                fill='#2c3e50',
+                tags="coordinate"
             )
 
+    def board_font(self, size, weight="bold"):
+        """Shared Font object for board text, created once per size"""
+        key = (size, weight)
+        if key not in self.board_fonts:
+            self.board_fonts[key] = tkfont.Font(root=self.root, family="Arial", size=size, weight=weight)
+        return self.board_fonts[key]
+
+    def on_canvas_configure(self, event):
+        # Dragging the window edge fires a stream of events; rebuild once it settles
+        if self.resize_after_id:
+            self.root.after_cancel(self.resize_after_id)
+        self.resize_after_id = self.root.after(self.resize_delay, self.resize_board, event.width, event.height)
+
+    def resize_board(self, width, height):
+        """Fit the board into width x height pixels of canvas"""
+        self.resize_after_id = None
+        square_size = max(self.min_square_size, min(width, height) // 8)
+        if square_size == self.square_size:
+            return
+        
+        self.square_size = square_size
+        self.board_size = square_size * 8
+        self.create_board_items()
+        self.draw_board()
+
+    @instrumented("draw_board", ply_offset=0)
+    def draw_board(self):
+        """Bring the canvas in line with self.board, touching only squares that changed"""
+        if not hasattr(self, 'piece_items'):
+            self.create_board_items()
+        
+        # Pieces: only the from/to/captured/castling/en passant squares differ after a move
+        piece_map = self.board.piece_map()
+        for square, drawn in self.drawn_pieces.items():
+            piece = piece_map.get(square)
+            if piece == drawn:
+                continue
+            
+            shadow_item, piece_item = self.piece_items[square]
+            if piece:
+                piece_symbol = self.get_enhanced_piece_symbol(piece)
+                text_color = '#1a1a1a' if piece.color == chess.WHITE else '#8b0000'
+                shadow_color = '#d3d3d3' if piece.color == chess.WHITE else '#4d0000'
+                self.canvas.itemconfig(shadow_item, text=piece_symbol, fill=shadow_color, state=tk.NORMAL)
+                self.canvas.itemconfig(piece_item, text=piece_symbol, fill=text_color, state=tk.NORMAL)
+            else:
+                self.canvas.itemconfig(shadow_item, state=tk.HIDDEN)
+                self.canvas.itemconfig(piece_item, state=tk.HIDDEN)
+            self.drawn_pieces[square] = piece
+        
+        # Highlight last move with better colors
+        last_move = self.board.peek() if self.board.move_stack else None
+        self.highlight_square("last_from", last_move and last_move.from_square, self.last_move_color)
+        self.highlight_square("last_to", last_move and last_move.to_square, self.last_move_color)
+        
+        # Highlight selected square
+        selected = getattr(self, 'selected_square', None)
+        self.highlight_square("selected", selected, self.selected_color)
+        
+        # Destination hints for the selected piece
+        hints = {}
+        if selected is not None:
+            hints = {square: square in piece_map for square in self.legal_move_index().destinations(selected)}
+        for square, capture in self.drawn_hints.items():
+            if hints.get(square) != capture:
+                self.canvas.itemconfig(self.hint_items[square], state=tk.HIDDEN)
+        for square, capture in hints.items():
+            if self.drawn_hints.get(square) == capture:
+                continue
+            x1, y1, x2, y2 = self.square_bounds(square)
+            if capture:
+                self.canvas.coords(self.hint_items[square], x1 + 3, y1 + 3, x2 - 3, y2 - 3)
+                self.canvas.itemconfig(self.hint_items[square], fill="", outline=self.hint_color, width=3, state=tk.NORMAL)
+            else:
+                inset = self.square_size * 3 // 8
+                self.canvas.coords(self.hint_items[square], x1 + inset, y1 + inset, x2 - inset, y2 - inset)
+                self.canvas.itemconfig(self.hint_items[square], fill=self.hint_color, outline="", width=0, state=tk.NORMAL)
+        self.drawn_hints = hints
+
+    def legal_move_index(self):
+        """Legal moves of the current position, generated once per position"""
+        key = self.outcome.key
+        if self.move_index is None or self.move_index.key != key:
+            self.move_index = LegalMoveIndex(self.board, key)
+        return self.move_index
+
     def get_enhanced_piece_symbol(self, piece):
         # Enhanced Unicode chess symbols
         white_symbols = {
@@ -535,110 +1211,591 @@ class ChessGUI:
         else:
             return black_symbols.get(piece.piece_type, "")
 
-    def highlight_square(self, square, color):
-        row = chess.square_rank(square)
-        col = chess.square_file(square)
-        x1 = col * self.square_size
-        y1 = (7 - row) * self.square_size
-        x2 = x1 + self.square_size
-        y2 = y1 + self.square_size
+    def highlight_square(self, name, square, color):
+        """Move the named highlight frame to square, or hide it when square is None"""
+        if self.drawn_highlights[name] == (square, color):
+            return
+        self.drawn_highlights[name] = (square, color)
         
-        self.canvas.create_rectangle(
-            x1 + 3, y1 + 3, x2 - 3, y2 - 3, 
-            outline=color, 
-            width=4,
-            tags=f"highlight_{row}_{col}"
-        )
+        item = self.highlight_items[name]
+        if square is None:
+            self.canvas.itemconfig(item, state=tk.HIDDEN)
+            return
+        
+        x1, y1, x2, y2 = self.square_bounds(square)
+        self.canvas.coords(item, x1 + 3, y1 + 3, x2 - 3, y2 - 3)
+        self.canvas.itemconfig(item, outline=color, state=tk.NORMAL)
+
+    def square_bounds(self, square):
+        """Canvas rectangle (x1, y1, x2, y2) of square"""
+        x1 = chess.square_file(square) * self.square_size
+        y1 = (7 - chess.square_rank(square)) * self.square_size
+        return x1, y1, x1 + self.square_size, y1 + self.square_size
+
+    def square_at(self, x, y):
+        """Square under canvas point (x, y), or None outside the board"""
+        col = x // self.square_size
+        row = 7 - (y // self.square_size)
+        if not (0 <= row < 8 and 0 <= col < 8):
+            return None
+        return chess.square(col, row)
+
+    def accepts_input(self):
+        """True when the human may move pieces on the board"""
+        return not (self.engine_thinking or self.game_mode.get() == "engine_vs_engine" or
+                    self.outcome.is_game_over())
 
     def on_square_clicked(self, event):
-        if self.engine_thinking or self.game_mode.get() == "engine_vs_engine":
+        self.cancel_drag()
+        if not self.accepts_input():
             return
         
-        col = event.x // self.square_size
-        row = 7 - (event.y // self.square_size)
+        square = self.square_at(event.x, event.y)
+        if square is None:
+            return
         
-        if not (0 <= row < 8 and 0 <= col < 8):
+        if self.promotion_choices:
+            # A click on one of the offered pieces promotes, anywhere else cancels
+            move = self.promotion_choices.get(square)
+            self.close_promotion_picker()
+            if move:
+                self.play_human_move(move)
+            else:
+                self.draw_board()
             return
         
-        square = chess.square(col, row)
+        selected = getattr(self, 'selected_square', None)
+        if selected is not None and square in self.legal_move_index().destinations(selected):
+            self.try_move(selected, square)
+            return
         
-        if hasattr(self, 'selected_square'):
-            # Try to make a move
-            move = chess.Move(self.selected_square, square)
-            
-            # Check for pawn promotion
-            if (self.board.piece_at(self.selected_square) and 
-                self.board.piece_at(self.selected_square).piece_type == chess.PAWN and
-                (chess.square_rank(square) in [0, 7])):
-                move = chess.Move(self.selected_square, square, promotion=chess.QUEEN)
-            
-            if move in self.board.legal_moves:
-                self.make_move(move)
-                delattr(self, 'selected_square')
-                
-                # If player vs engine and it's engine's turn
-                if (self.game_mode.get() == "player_vs_engine" and
-                    not self.board.is_game_over() and
-                    self.board.turn == chess.BLACK):
-                    self.engine_move()
-            else:
-                # Select a different piece
-                if (self.board.piece_at(square) and 
-                    self.board.color_at(square) == self.board.turn):
-                    self.selected_square = square
-                else:
-                    delattr(self, 'selected_square')
+        if self.board.color_at(square) == self.board.turn:
+            # Select a piece; moving the pointer with the button held drags it
+            self.selected_square = square
+            self.drag = {"square": square, "x0": event.x, "y0": event.y, "x": event.x, "y": event.y, "active": False}
+        elif selected is not None:
+            delattr(self, 'selected_square')
+        
+        self.draw_board()
+
+    def on_drag(self, event):
+        if not self.drag:
+            return
+        self.drag["x"], self.drag["y"] = event.x, event.y
+        # Motion events come much faster than the screen refreshes; follow them at most every drag_interval
+        if self.drag_after_id is None:
+            self.drag_after_id = self.root.after(self.drag_interval, self.update_drag)
+
+    def update_drag(self):
+        self.drag_after_id = None
+        drag = self.drag
+        if not drag:
+            return
+        
+        if not drag["active"]:
+            if max(abs(drag["x"] - drag["x0"]), abs(drag["y"] - drag["y0"])) < self.drag_threshold:
+                return
+            # Lift the piece off its square onto the drag item
+            drag["active"] = True
+            square = drag["square"]
+            piece = self.board.piece_at(square)
+            for item in self.piece_items[square]:
+                self.canvas.itemconfig(item, state=tk.HIDDEN)
+            self.drawn_pieces[square] = None
+            self.canvas.itemconfig(
+                self.drag_item,
+                text=self.get_enhanced_piece_symbol(piece),
+                fill='#1a1a1a' if piece.color == chess.WHITE else '#8b0000',
+                state=tk.NORMAL
+            )
+        
+        self.canvas.coords(self.drag_item, drag["x"], drag["y"])
+
+    def on_drop(self, event):
+        drag = self.drag
+        self.cancel_drag()
+        if not drag or not drag["active"]:
+            # A plain click; the press already selected the piece
+            return
+        
+        target = self.square_at(event.x, event.y)
+        if (target is not None and self.accepts_input() and
+            target in self.legal_move_index().destinations(drag["square"])):
+            self.try_move(drag["square"], target)
         else:
-            # Select a piece
-            if (self.board.piece_at(square) and 
-                self.board.color_at(square) == self.board.turn):
-                self.selected_square = square
+            # Put the piece back on its square
+            self.draw_board()
+
+    def cancel_drag(self):
+        if self.drag_after_id:
+            self.root.after_cancel(self.drag_after_id)
+            self.drag_after_id = None
+        if self.drag and self.drag["active"]:
+            self.canvas.itemconfig(self.drag_item, state=tk.HIDDEN)
+        self.drag = None
+
+    def try_move(self, from_square, to_square):
+        """Play the human move between two squares, asking for the piece on a promotion"""
+        index = self.legal_move_index()
+        if index.is_promotion(from_square, to_square):
+            self.open_promotion_picker(from_square, to_square)
+            return
+        self.play_human_move(index.moves(from_square, to_square)[0])
+
+    def play_human_move(self, move):
+        if hasattr(self, 'selected_square'):
+            delattr(self, 'selected_square')
+        self.make_move(move)
         
+        # If player vs engine and it's engine's turn
+        if (self.game_mode.get() == "player_vs_engine" and
+            not self.outcome.is_game_over() and
+            self.board.turn == chess.BLACK):
+            self.engine_move()
+
+    def open_promotion_picker(self, from_square, to_square):
+        """Offer the promotion pieces on the squares from to_square towards the centre"""
+        index = self.legal_move_index()
+        color = self.board.turn
+        step = -1 if chess.square_rank(to_square) == 7 else 1
+        self.promotion_choices = {}
+        for i, piece_type in enumerate(PROMOTION_PIECES):
+            square = chess.square(chess.square_file(to_square), chess.square_rank(to_square) + i * step)
+            self.promotion_choices[square] = index.promotion(from_square, to_square, piece_type)
+            
+            x1, y1, x2, y2 = self.square_bounds(square)
+            self.canvas.create_rectangle(x1, y1, x2, y2, fill='#ecf0f1', outline='#2c3e50', width=2, tags="promotion")
+            self.canvas.create_text(
+                (x1 + x2) // 2, (y1 + y2) // 2,
+                text=self.get_enhanced_piece_symbol(chess.Piece(piece_type, color)),
+                font=self.piece_font,
+                fill='#1a1a1a' if color == chess.WHITE else '#8b0000',
+                tags="promotion"
+            )
         self.draw_board()
 
+    def close_promotion_picker(self):
+        if self.promotion_choices is not None:
+            self.canvas.delete("promotion")
+            self.promotion_choices = None
+
+    def clear_selection(self):
+        """Drop the selected piece, a drag in progress and an open promotion picker"""
+        if hasattr(self, 'selected_square'):
+            delattr(self, 'selected_square')
+        self.cancel_drag()
+        self.close_promotion_picker()
+
+    @instrumented("make_move")
     def make_move(self, move):
-        self.board.push(move)
-        self.update_move_list()
+        if self.clock:
+            # A move that arrives after the flag fell does not count
+            if self.clock.flagged(self.board.turn):
+                self.on_flag()
+                return
+            self.clock.press(self.board.turn)
+        
+        self.cancel_review()
+        # Playing on from an earlier position starts a new variation
+        self.telemetry.truncate(len(self.board.move_stack))
+        self.telemetry.record_move(self.board, move)
+        self.outcome.push(move)
+        
+        node = self.move_tree.add(self.current_node, move, self.board)
+        self.current_node = node
+        ply = self.move_tree.ply(node)
+        if ply == len(self.line) + 1:
+            self.line.append(node)
+            self.update_move_list()
+        elif self.line[ply - 1] is not node:
+            self.set_line(node)
+        self.select_move_row()
         self.draw_board()
         
-        # Check for game over
-        if self.board.is_game_over():
-            result = self.board.result()
-            if result == "1-0":
-                messagebox.showinfo("Game Over", "White wins! 🎉")
-                if self.engine_battle_active:
-                    self.toggle_engine_battle()
-            elif result == "0-1":
-                messagebox.showinfo("Game Over", "Black wins! 🎉")
-                if self.engine_battle_active:
-                    self.toggle_engine_battle()
-            elif result == "1/2-1/2":
-                messagebox.showinfo("Game Over", "Draw! 🤝")
-                if self.engine_battle_active:
-                    self.toggle_engine_battle()
+        self.restart_analysis()
+        
+        # Check for game over (kept up to date by the tracker, no stack walk)
+        if self.outcome.is_game_over():
+            self.on_game_over()
         elif self.engine_battle_active and not self.engine_thinking:
             # Continue the engine battle
             self.engine_move()
 
+    def on_game_over(self):
+        """Stop the clocks, archive a finished battle and announce the result"""
+        if self.clock:
+            self.clock.stop()
+            self.update_clock_labels()
+        if self.engine_battle_active:
+            self.archive_finished_game()
+        result = self.outcome.result()
+        reason = self.outcome.reason()
+        if result == "1-0":
+            self.show_toast(f"Game Over: White wins! 🎉 ({reason})")
+        elif result == "0-1":
+            self.show_toast(f"Game Over: Black wins! 🎉 ({reason})")
+        else:
+            self.show_toast(f"Game Over: Draw! 🤝 ({reason})")
+        if self.engine_battle_active:
+            self.toggle_engine_battle()
+
+    def reset_clock(self):
+        """Set up fresh clocks from the clock settings (self.clock is None when they are off)
+        
+        The clock starts with White's first move; a game already in progress
+        starts the side to move straight away.
+        """
+        self.clock = None
+        if self.clock_enabled.get():
+            try:
+                self.clock = ChessClock(
+                    self.clock_base.get() * 60,
+                    self.clock_increment.get(),
+                    self.clock_moves_to_go.get()
+                )
+            except tk.TclError:
+                messagebox.showerror("Error", "Invalid clock settings")
+                self.clock_enabled.set(False)
+        
+        if self.clock and self.board.move_stack and not self.outcome.is_game_over():
+            self.clock.start(self.board.turn)
+        self.update_clock_labels()
+
+    def update_clock_labels(self):
+        for color, label in self.clock_labels.items():
+            name = "White" if color == chess.WHITE else "Black"
+            if not self.clock:
+                label.config(text=f"{name}  --:--", bg='#2c3e50')
+                continue
+            
+            left = self.clock.time_left(color)
+            if left <= 0:
+                bg = '#e74c3c'
+            elif self.clock.running == color:
+                bg = '#27ae60'
+            else:
+                bg = '#2c3e50'
+            label.config(text=f"{name}  {format_clock(left)}", bg=bg)
+
+    def update_clocks(self):
+        """Refresh the clock display and check for a fallen flag every 100 ms"""
+        if self.clock:
+            self.update_clock_labels()
+            if (self.clock.running is not None and
+                not self.outcome.is_game_over() and
+                self.clock.flagged(self.clock.running)):
+                self.on_flag()
+        self.root.after(100, self.update_clocks)
+
+    def on_flag(self):
+        """The side to move ran out of time: adjudicate and end the game"""
+        self.stop_engine_search()
+        self.outcome.adjudicate(self.clock.flag_result(self.board), "time forfeit")
+        self.restart_analysis()
+        self.on_game_over()
+
+    def show_stats_window(self):
+        """Live per-ply timings and engine statistics with JSON/CSV export"""
+        if getattr(self, 'stats_window', None) and self.stats_window.winfo_exists():
+            self.stats_window.lift()
+            return
+        
+        self.stats_window = tk.Toplevel(self.root)
+        self.stats_window.title("Performance Stats")
+        self.stats_window.configure(bg='#2c3e50')
+        
+        self.stats_summary = tk.Label(
+            self.stats_window,
+            font=("Consolas", 9),
+            bg='#2c3e50',
+            fg='#ecf0f1',
+            justify=tk.LEFT,
+            anchor=tk.W
+        )
+        self.stats_summary.pack(fill=tk.X, padx=10, pady=(10, 5))
+        
+        self.stats_text = tk.Text(
+            self.stats_window,
+            height=20,
+            width=92,
+            font=("Consolas", 9),
+            bg='#ecf0f1',
+            fg='#2c3e50',
+            wrap=tk.NONE,
+            state=tk.DISABLED
+        )
+        self.stats_text.pack(fill=tk.BOTH, expand=True, padx=10)
+        
+        export_frame = tk.Frame(self.stats_window, bg='#2c3e50')
+        export_frame.pack(fill=tk.X, padx=10, pady=10)
+        tk.Button(export_frame, text="Export JSON", command=lambda: self.export_telemetry(".json")).pack(side=tk.LEFT)
+        tk.Button(export_frame, text="Export CSV", command=lambda: self.export_telemetry(".csv")).pack(side=tk.LEFT, padx=5)
+        
+        self.update_stats_window()
+
+    def update_stats_window(self):
+        """Redraw the stats window twice a second while it is open"""
+        if not self.stats_window.winfo_exists():
+            return
+        
+        def ms(record, key):
+            return f"{record[key]:.1f}" if key in record else "-"
+        
+        def count(record, key, scale=1):
+            return f"{record[key] / scale:.0f}" if key in record else "-"
+        
+        rows = [
+            f"{'Ply':>4} {'Move':<8} {'Source':<9} {'Think':>8} {'Queue':>8} {'Make':>8} {'Draw':>8} "
+            f"{'Depth':>5} {'kN/s':>7} {'Hash%':>5}"
+        ]
+        for record in self.telemetry.records()[-200:]:
+            if "move" not in record:
+                continue
+            rows.append(
+                f"{record['ply']:>4} {record['move']:<8} {record.get('source', ''):<9} "
+                f"{ms(record, 'think_ms'):>8} {ms(record, 'queue_ms'):>8} {ms(record, 'make_move_ms'):>8} "
+                f"{ms(record, 'draw_board_ms'):>8} {count(record, 'depth'):>5} "
+                f"{count(record, 'nps', 1000):>7} {count(record, 'hashfull', 10):>5}"
+            )
+        
+        summary = self.telemetry.summary()
+        lines = ["Times in ms (mean / max):"]
+        for key in ("think_ms", "queue_ms", "make_move_ms", "draw_board_ms"):
+            if key in summary:
+                lines.append(f"  {key[:-3]:<12} {summary[key]['mean']:9.2f} / {summary[key]['max']:9.2f}")
+        for service in list(self.engine_pool.services):
+            health = service.health
+            if any(health.values()):
+                lines.append(f"  {service.name}: {health['timeouts']} timeouts, {health['crashes']} crashes, "
+                             f"{health['restarts']} restarts")
+        self.stats_summary.config(text="\n".join(lines))
+        
+        self.stats_text.config(state=tk.NORMAL)
+        self.stats_text.delete("1.0", tk.END)
+        self.stats_text.insert(tk.END, "\n".join(rows))
+        self.stats_text.see(tk.END)
+        self.stats_text.config(state=tk.DISABLED)
+        self.root.after(500, self.update_stats_window)
+
+    def export_telemetry(self, extension):
+        """Write this game's per-ply telemetry to a JSON or CSV file"""
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=extension,
+            filetypes=[("JSON files", "*.json")] if extension == ".json" else [("CSV files", "*.csv")]
+        )
+        if not file_path:
+            return
+        try:
+            if file_path.lower().endswith(".csv"):
+                self.telemetry.write_csv(file_path)
+            else:
+                self.telemetry.write_json(file_path, self.game_headers())
+            messagebox.showinfo("Success", "Telemetry exported successfully!")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to export telemetry: {str(e)}")
+
+    def show_toast(self, message, duration=4000):
+        """Show a non-modal notice over the board that hides itself after duration ms"""
+        if not hasattr(self, 'toast'):
+            self.toast = tk.Label(
+                self.board_frame,
+                font=("Arial", 12, "bold"),
+                bg='#2c3e50',
+                fg='#ecf0f1',
+                relief=tk.RAISED,
+                bd=2,
+                padx=15,
+                pady=8
+            )
+            self.toast_after_id = None
+        
+        self.toast.config(text=message)
+        self.toast.place(relx=0.5, rely=0.5, anchor=tk.CENTER)
+        self.toast.lift()
+        if self.toast_after_id:
+            self.root.after_cancel(self.toast_after_id)
+        self.toast_after_id = self.root.after(duration, self.toast.place_forget)
+
+    def review_game(self):
+        """Analyse every position of the game in parallel and annotate the move list"""
+        if not self.line:
+            messagebox.showinfo("Review Game", "There are no moves to review.")
+            return
+        if self.engine_battle_active:
+            self.toggle_engine_battle()
+        self.stop_engine_search()
+        self.cancel_review()
+        if self.analysis_enabled.get():
+            self.analysis_enabled.set(False)
+            self.on_analysis_change()
+        
+        self.rebuild_move_list()
+        self.draw_eval_graph()
+        self.engine_status.config(
+            text="Review: starting engines...", 
+            bg='#f39c12',
+            fg='white'
+        )
+        # The whole line in the move history, wherever the board currently is
+        board = self.line_board()
+        self.engine_pool.acquire(
+            self.review_engines,
+            lambda services: self.root.after(0, self.start_review, board, services),
+            lambda error: self.root.after(0, self.on_engine_init_error, str(error))
+        )
+
+    def start_review(self, board, services):
+        if board.move_stack != [node.move for node in self.line]:
+            # The game changed while the engines were starting
+            return
+        # Every review engine searches at once: one share of the cores each
+        for assignment, service in zip(self.scheduler.plan(len(services), len(self.engine_pool.services)), services):
+            service.set_resources(assignment["options"], assignment["cpus"])
+        self.review = GameReview(
+            board,
+            services,
+            chess.engine.Limit(time=self.review_time_limit),
+            on_position=lambda index, info: self.root.after(0, self.on_review_position, index),
+            on_error=lambda error: self.root.after(0, self.on_engine_error, str(error))
+        )
+        self.update_review_status()
+        self.review.start()
+
+    def cancel_review(self):
+        if self.review:
+            self.review.cancel()
+            self.review = None
+
+    def on_review_position(self, index):
+        """A position was analysed: annotate the moves into and out of it"""
+        review = self.review
+        if not review or review.cancelled:
+            return
+        
+        for ply in (index, index + 1):
+            if 1 <= ply <= len(review.moves):
+                annotation = review.annotate(ply)
+                if annotation:
+                    self.annotate_move_row(ply, annotation)
+        self.update_review_status()
+        
+        # Many results can land in one Tk tick; redraw the graph once for all of them
+        if not self.review_graph_pending:
+            self.review_graph_pending = True
+            self.root.after_idle(self.draw_eval_graph)
+
+    def annotate_move_row(self, ply, annotation):
+        move = self.review.moves[ply - 1]
+        text = f"  {move.uci():<6}{annotation['mark']:<3}{format_score(annotation['score']):>6}"
+        if annotation["mark"] and annotation["best"]:
+            text += f" ({annotation['best']})"
+        
+        # Same layout as rebuild_move_list: a number row before every White move
+        row = (ply - 1) + (ply - 1) // 2 + 1
+        self.move_list.delete(row)
+        self.move_list.insert(row, text)
+        colors = {"??": '#c0392b', "?": '#d35400', "?!": '#b7950b'}
+        if annotation["mark"]:
+            self.move_list.itemconfig(row, fg=colors[annotation["mark"]])
+
+    def update_review_status(self):
+        review = self.review
+        analysed, total = len(review.results), len(review.boards)
+        if not review.done:
+            self.engine_status.config(
+                text=f"Review: {analysed}/{total} positions", 
+                bg='#f39c12',
+                fg='white'
+            )
+            return
+        
+        marks = [review.annotate(ply)["mark"] for ply in range(1, len(review.moves) + 1)]
+        self.engine_status.config(
+            text=f"Review: {marks.count('??')} blunders, {marks.count('?')} mistakes, "
+                 f"{marks.count('?!')} inaccuracies",
+            bg='#27ae60',
+            fg='white'
+        )
+
+    def draw_eval_graph(self):
+        """White's evaluation per ply, capped at +-5 pawns; blunders as red dots"""
+        self.review_graph_pending = False
+        self.eval_graph.delete("all")
+        width = self.eval_graph.winfo_width()
+        height = self.eval_graph.winfo_height()
+        if width <= 1:
+            width, height = 200, 70
+        self.eval_graph.create_line(0, height / 2, width, height / 2, fill='#7f8c8d')
+        
+        review = self.review
+        if not review or len(review.boards) < 2:
+            return
+        
+        step = width / (len(review.boards) - 1)
+        
+        def point(index):
+            cp = max(-500, min(500, white_cp(review.results[index]) or 0))
+            return index * step, height / 2 - cp / 500 * (height / 2 - 2)
+        
+        # One polyline per run of consecutive analysed positions
+        segment = []
+        for index in range(len(review.boards) + 1):
+            if index < len(review.boards) and index in review.results:
+                segment.extend(point(index))
+                continue
+            if len(segment) >= 4:
+                self.eval_graph.create_line(*segment, fill='#ecf0f1', width=2)
+            segment = []
+        
+        for ply in range(1, len(review.moves) + 1):
+            annotation = review.annotate(ply)
+            if annotation and annotation["mark"] == "??":
+                x, y = point(ply)
+                self.eval_graph.create_oval(x - 3, y - 3, x + 3, y + 3, fill='#e74c3c', outline='')
+
+    def move_row_text(self, node):
+        """Move history row; moves with alternatives show how many moves were tried here"""
+        text = f"  {node.move.uci()}"
+        alternatives = len(node.parent.variations)
+        if alternatives > 1:
+            text += f"  [{alternatives}]"
+        return text
+
     def update_move_list(self):
-        move_count = len(self.board.move_stack)
+        """Append the last move of the line to the move history"""
+        move_count = len(self.line)
         
         if move_count % 2 == 1:
             move_number = f"{move_count // 2 + 1}."
             self.move_list.insert(tk.END, move_number)
         
         if move_count > 0:
-            last_move = self.board.peek()
-            self.move_list.insert(tk.END, f"  {last_move.uci()}")
+            self.move_list.insert(tk.END, self.move_row_text(self.line[-1]))
         
         self.move_list.see(tk.END)
 
+    def rebuild_move_list(self):
+        """Refill the move history from the line in a single batched insert"""
+        rows = []
+        for ply, node in enumerate(self.line):
+            if ply % 2 == 0:
+                rows.append(f"{ply // 2 + 1}.")
+            rows.append(self.move_row_text(node))
+        
+        self.move_list.delete(0, tk.END)
+        if rows:
+            self.move_list.insert(tk.END, *rows)
+        self.select_move_row()
+
+    @instrumented("engine_move")
     def engine_move(self):
-        if self.engine_thinking or self.board.is_game_over():
+        if self.engine_thinking or self.outcome.is_game_over():
             return
         
         current_engine = self.engine_white if self.board.turn == chess.WHITE else self.engine_black
         if not current_engine:
+            # Retired for idleness (or still starting); on_engines_ready moves again
+            self.start_engines()
             return
         
         self.engine_thinking = True
@@ -648,28 +1805,85 @@ class ChessGUI:
             fg='white'
         )
         
-        def engine_thread():
-            try:
-                # Set engine level if supported
-                if hasattr(current_engine, 'configure'):
-                    try:
-                        current_engine.configure({"Skill Level": self.engine_level.get()})
-                    except chess.engine.EngineError:
-                        pass
-                
-                result = current_engine.play(
-                    self.board,
-                    chess.engine.Limit(time=self.time_limit.get()),
-                    info=chess.engine.INFO_ALL
-                )
-                
-                self.root.after(0, self.on_engine_move_received, result.move)
-            except Exception as e:
-                self.root.after(0, self.on_engine_error, str(e))
+        ply = len(self.board.move_stack) + 1
         
-        threading.Thread(target=engine_thread, daemon=True).start()
+        # Book moves are played with zero engine latency
+        if self.opening_book:
+            book_move = self.opening_book.pick(self.board)
+            if book_move:
+                self.telemetry.mark_posted(ply, "book")
+                self.root.after(0, self.on_engine_move_received, book_move, current_engine, current_engine.generation)
+                return
+        
+        # Tablebase-optimal moves skip the engine entirely
+        if self.tablebase:
+            probe = self.tablebase.best_move(self.board)
+            if probe:
+                move, wdl = probe
+                self.telemetry.mark_posted(ply, "tablebase")
+                self.root.after(0, self.on_engine_move_received, move, current_engine, current_engine.generation,
+                                self.tablebase.describe(self.board, wdl))
+                return
+        
+        # Only full-strength results are cached; weakened play must stay varied
+        use_cache = self.engine_level.get() >= 20
+        if use_cache:
+            cached = self.position_cache.get(self.board, current_engine.engine_id)
+            if cached and cached.depth >= self.cache_min_depth:
+                self.telemetry.mark_posted(ply, "cache")
+                self.root.after(0, self.on_engine_move_received, cached.move, current_engine, current_engine.generation)
+                return
+        
+        board = self.board.copy()
+        search_started = time.perf_counter()
+        
+        def on_result(result, generation):
+            self.telemetry.record_search(ply, result.info, time.perf_counter() - search_started)
+            if use_cache:
+                self.position_cache.put(board, current_engine.engine_id, result.move, result.info)
+            self.telemetry.mark_posted(ply, "engine")
+            self.root.after(0, self.on_engine_move_received, result.move, current_engine, generation)
+        
+        # With clocks running the engine manages its own time from both clocks
+        if self.clock:
+            limit = self.clock.limit(board.turn)
+        else:
+            limit = chess.engine.Limit(time=self.time_limit.get())
+        
+        # The service pushes Skill Level (and scheduled Threads/Hash) only when
+        # they changed and drops results from searches that were stopped in the meantime
+        self.schedule_engines()
+        current_engine.play(
+            board,
+            limit,
+            {"Skill Level": self.engine_level.get()},
+            ponder=self.pondering(),
+            on_result=on_result,
+            on_error=lambda error, generation: self.root.after(
+                0, self.on_engine_error, str(error), current_engine, generation)
+        )
+
+    def stop_engine_search(self):
+        """Abandon any running engine search, e.g. on undo, new game or mode change"""
+        for engine in (self.engine_white, self.engine_black):
+            if engine:
+                engine.stop()
+        
+        if self.engine_thinking:
+            self.engine_thinking = False
+            self.engine_status.config(
+                text="Engines: Ready", 
+                bg='#27ae60',
+                fg='white'
+            )
 
-    def on_engine_move_received(self, move):
+    @instrumented("on_engine_move_received")
+    def on_engine_move_received(self, move, engine=None, generation=None, note=None):
+        # A stop() may have landed while this callback was waiting in the Tk queue
+        if engine and not engine.is_current(generation):
+            return
+        self.telemetry.mark_received(len(self.board.move_stack) + 1)
+        
         self.engine_thinking = False
         self.engine_status.config(
             text="Engines: Ready", 
@@ -679,12 +1893,22 @@ class ChessGUI:
         
         if move in self.board.legal_moves:
             self.make_move(move)
+            if self.game_mode.get() == "engine_vs_engine" and not self.engine_battle_active:
+                # The last search of a paused battle must not ponder on
+                self.stop_pondering()
+            if note:
+                self.engine_status.config(text=note)
+            elif engine and engine.ponder_move and not self.outcome.is_game_over():
+                self.engine_status.config(text=f"Engine: Pondering {engine.ponder_move.uci()}")
         else:
             messagebox.showerror("Error", "Engine returned illegal move")
             if self.engine_battle_active:
                 self.toggle_engine_battle()
 
-    def on_engine_error(self, error):
+    def on_engine_error(self, error, engine=None, generation=None):
+        if engine and not engine.is_current(generation):
+            return
+        
         self.engine_thinking = False
         self.engine_status.config(
             text="Engine: Error", 
@@ -695,22 +1919,53 @@ class ChessGUI:
         if self.engine_battle_active:
             self.toggle_engine_battle()
 
+    def engines_needed(self):
+        """Number of engine processes the current game mode uses"""
+        return {"player_vs_engine": 1, "engine_vs_engine": 2}.get(self.game_mode.get(), 0)
+
     def start_engines(self):
-        def engine_init_thread():
-            try:
-                # Start white engine
-                self.engine_white = chess.engine.SimpleEngine.popen_uci(self.engine_path)
-                
-                # Start black engine (same executable, separate process)
-                self.engine_black = chess.engine.SimpleEngine.popen_uci(self.engine_path)
-                
-                self.root.after(0, self.on_engines_ready)
-            except Exception as e:
-                self.root.after(0, self.on_engine_init_error, str(e))
+        """Acquire the engines the current mode needs from the pool, spawning on demand"""
+        count = self.engines_needed()
+        if count == 0:
+            return
+        if (count == 1 and self.engine_black) or (self.engine_white and self.engine_black):
+            return
         
-        threading.Thread(target=engine_init_thread, daemon=True).start()
+        self.engine_status.config(
+            text="Engines: Starting...", 
+            bg='#f39c12',
+            fg='white'
+        )
+        # Player vs Engine shares one process; Engine vs Engine adds a second for White
+        self.engine_pool.acquire(
+            count,
+            lambda services: self.root.after(0, self.on_engines_ready, *services),
+            lambda error: self.root.after(0, self.on_engine_init_error, str(error))
+        )
+
+    def check_idle_engines(self):
+        """Shut down engine processes that have been idle for engine_idle_timeout"""
+        retired = self.engine_pool.reap_idle()
+        if self.engine_white in retired:
+            self.engine_white = None
+        if self.engine_black in retired:
+            self.engine_black = None
+        if self.analysis_engine in retired:
+            self.analysis_engine = None
+        if retired and not (self.engine_white or self.engine_black):
+            self.engine_status.config(
+                text="Engines: Idle (stopped)", 
+                bg='#7f8c8d',
+                fg='white'
+            )
+        self.root.after(10000, self.check_idle_engines)
 
-    def on_engines_ready(self):
+    def on_engines_ready(self, engine_black, engine_white=None):
+        self.engine_black = engine_black
+        if engine_white:
+            self.engine_white = engine_white
+        if self.engine_thinking:
+            return
         self.engine_status.config(
             text="Engines: Ready", 
             bg='#27ae60',
@@ -721,8 +1976,7 @@ class ChessGUI:
             self.board.turn == chess.BLACK):
             self.engine_move()
         elif (self.game_mode.get() == "engine_vs_engine" and
-              self.engine_battle_active and
-              self.board.turn == chess.WHITE):
+              self.engine_battle_active):
             self.engine_move()
 
     def on_engine_init_error(self, error):
@@ -735,11 +1989,20 @@ class ChessGUI:
         self.game_mode.set("player_vs_player")
 
     def new_game(self):
+        self.stop_engine_search()
+        self.cancel_review()
+        # Keep the engine processes; the next search sends ucinewgame
+        self.engine_pool.new_game()
         self.board.reset()
+        self.outcome.reset(self.board)
+        self.current_node = self.move_tree.reset(self.board)
+        self.line = []
+        self.telemetry.reset()
+        self.reset_clock()
         self.move_list.delete(0, tk.END)
-        if hasattr(self, 'selected_square'):
-            delattr(self, 'selected_square')
+        self.clear_selection()
         self.draw_board()
+        self.restart_analysis()
         
         if (self.game_mode.get() == "player_vs_engine" and
             self.board.turn == chess.BLACK and
@@ -752,37 +2015,118 @@ class ChessGUI:
             self.engine_move()
 
     def undo_move(self):
-        if len(self.board.move_stack) > 0:
-            self.board.pop()
-            
-            # Remove the last move from the list
-            if self.move_list.size() > 0:
-                last_item = self.move_list.get(self.move_list.size() - 1)
-                self.move_list.delete(self.move_list.size() - 1)
-                
-                # If it was just a move (not a move number), check if we need to remove the move number too
-                if not last_item.strip().endswith('.') and self.move_list.size() > 0:
-                    prev_item = self.move_list.get(self.move_list.size() - 1)
-                    if prev_item.strip().endswith('.'):
-                        self.move_list.delete(self.move_list.size() - 1)
-            
-            if hasattr(self, 'selected_square'):
-                delattr(self, 'selected_square')
-            self.draw_board()
+        """Step back one move; the move stays in the move tree"""
+        if self.current_node.parent is not None:
+            self.go_to(self.current_node.parent)
+
+    def go_to(self, node):
+        """Show the position at node: one snapshot copy, a few pushes and one redraw"""
+        if node is self.current_node or self.engine_battle_active:
+            return
+        self.stop_engine_search()
+        
+        self.current_node = node
+        self.board = self.move_tree.board(node)
+        self.outcome.reset(self.board, self.move_tree.keys(node))
+        if self.clock:
+            # The side to move gets its clock back
+            if self.board.move_stack and not self.outcome.is_game_over():
+                self.clock.start(self.board.turn)
+            else:
+                self.clock.stop()
+            self.update_clock_labels()
+        
+        self.clear_selection()
+        self.select_move_row()
+        self.draw_board()
+        self.restart_analysis()
+
+    def line_board(self):
+        """Board at the end of the line shown in the move history"""
+        return self.move_tree.board(self.line[-1]) if self.line else self.board.copy()
+
+    def set_line(self, node):
+        """Show node's line in the move history (a new variation drops the review)"""
+        self.cancel_review()
+        self.line = self.move_tree.line(node)
+        self.rebuild_move_list()
+
+    def select_move_row(self):
+        """Mark the current move in the move history"""
+        self.move_list.selection_clear(0, tk.END)
+        ply = self.move_tree.ply(self.current_node)
+        if ply:
+            row = (ply - 1) + (ply - 1) // 2 + 1
+            self.move_list.selection_set(row)
+            self.move_list.see(row)
+
+    def on_move_list_select(self, event):
+        selection = self.move_list.curselection()
+        if not selection:
+            return
+        # Three rows per move pair: the number, White's move, Black's move
+        pair, column = divmod(selection[0], 3)
+        ply = 2 * pair + max(column, 1)
+        if ply <= len(self.line):
+            self.go_to(self.line[ply - 1])
+        else:
+            self.select_move_row()
+
+    def on_navigation_key(self, event):
+        # Leave the arrow keys to entry fields, and Up/Down to the move list itself
+        if event.widget.winfo_class() in ("Entry", "Spinbox", "Text"):
+            return
+        if event.widget is self.move_list and event.keysym in ("Up", "Down"):
+            return
+        
+        if self.engine_battle_active:
+            return
+        
+        node = self.current_node
+        ply = self.move_tree.ply(node)
+        if event.keysym == "Left" and node.parent is not None:
+            self.go_to(node.parent)
+        elif event.keysym == "Right" and ply < len(self.line):
+            self.go_to(self.line[ply])
+        elif event.keysym == "Home":
+            self.go_to(self.move_tree.game)
+        elif event.keysym == "End" and self.line:
+            self.go_to(self.line[-1])
+        elif event.keysym in ("Up", "Down") and node.parent is not None:
+            # Cycle through the alternatives to the current move
+            siblings = node.parent.variations
+            step = -1 if event.keysym == "Up" else 1
+            sibling = siblings[(siblings.index(node) + step) % len(siblings)]
+            if sibling is not node:
+                self.set_line(sibling)
+                self.go_to(sibling)
 
     def __del__(self):
-        if self.engine_white:
-            try:
-                self.engine_white.quit()
-            except:
-                pass
-        if self.engine_black:
-            try:
-                self.engine_black.quit()
-            except:
-                pass
+        self.engine_pool.shutdown()
+        self.position_cache.close()
+        if self.opening_book:
+            self.opening_book.close()
+        if self.tablebase:
+            self.tablebase.close()
 
 if __name__ == "__main__":
+    # Headless subcommands: python chessgui4.py match --engine1 stockfish ...
+    if len(sys.argv) > 1 and sys.argv[1] == "match":
+        import match_runner
+        sys.exit(match_runner.main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "book":
+        import opening_book
+        sys.exit(opening_book.main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "analyse":
+        import batch_analysis
+        sys.exit(batch_analysis.main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        import benchmark
+        sys.exit(benchmark.main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        import remote_engine
+        sys.exit(remote_engine.main(sys.argv[2:]))
+    
     root = tk.Tk()
     chess_gui = ChessGUI(root)
     root.mainloop()
\ No newline at end of file
@@ -0,0 +1,96 @@
+import threading
+import time
+
+from engine_service import EngineService
+
+
+class EnginePool:
+    """Spawns EngineService processes on demand and retires idle ones
+
+    acquire(n) returns the first n services, starting any that are missing.
+    The same process is reused across modes and games: new_game() makes the
+    next search send "ucinewgame" instead of respawning. reap_idle() quits
+    services that have not searched for idle_timeout seconds.
+    """
+
+    def __init__(self, engine_path, idle_timeout=300.0, grace=2.0):
+        self.engine_path = engine_path
+        self.idle_timeout = idle_timeout
+        self.grace = grace
+        self.services = []
+        self._waiters = []
+        self._errors = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, count, on_ready, on_error=None):
+        """Call on_ready(services) once the first count services are running
+
+        Callbacks run on an engine service thread (or the caller's thread if
+        everything is already up).
+        """
+        with self._lock:
+            while len(self.services) < count:
+                service = EngineService(self.engine_path, f"Engine {len(self.services) + 1}", grace=self.grace)
+                self.services.append(service)
+                service.start(
+                    lambda ready_service: self._dispatch(),
+                    lambda error, failed=service: self._on_service_error(failed, error)
+                )
+            self._waiters.append((self.services[:count], on_ready, on_error))
+        self._dispatch()
+
+    def _on_service_error(self, service, error):
+        with self._lock:
+            self._errors[service] = error
+            if service in self.services:
+                self.services.remove(service)
+        self._dispatch()
+
+    def _dispatch(self):
+        ready, failed = [], []
+        with self._lock:
+            for waiter in list(self._waiters):
+                services, on_ready, on_error = waiter
+                errors = [self._errors[s] for s in services if s in self._errors]
+                if errors:
+                    self._waiters.remove(waiter)
+                    failed.append((on_error, errors[0]))
+                elif all(s.ready for s in services):
+                    self._waiters.remove(waiter)
+                    ready.append((on_ready, services))
+
+        for on_ready, services in ready:
+            on_ready(services)
+        for on_error, error in failed:
+            if on_error:
+                on_error(error)
+
+    def new_game(self):
+        """Reuse the running processes for a new game (ucinewgame on next search)"""
+        for service in list(self.services):
+            service.new_game()
+
+    def reap_idle(self, now=None):
+        """Quit services idle for longer than idle_timeout; returns the ones retired"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            idle = [
+                s for s in self.services
+                if s.ready and not s.busy and now - s.last_used > self.idle_timeout
+            ]
+            for service in idle:
+                self.services.remove(service)
+
+        for service in idle:
+            service.quit()
+        return idle
+
+    def shutdown(self):
+        with self._lock:
+            services, self.services = self.services, []
+            self._waiters = []
+        for service in services:
+            try:
+                service.quit()
+            except Exception:
+                pass
@@ -0,0 +1,352 @@
+import asyncio
+import threading
+import time
+
+import chess
+import chess.engine
+
+from remote_engine import is_remote, open_uci
+from resource_scheduler import fit_options, pin_process
+
+
+def search_deadline(limit, turn):
+    """Seconds a search under limit may take, or None for depth/node/infinite searches"""
+    if limit.time is not None:
+        return limit.time
+    clock = limit.white_clock if turn == chess.WHITE else limit.black_clock
+    if clock is not None:
+        increment = limit.white_inc if turn == chess.WHITE else limit.black_inc
+        return clock + (increment or 0)
+    return None
+
+
+class EngineService:
+    """A long-lived UCI engine driven from its own asyncio event loop thread
+
+    Searches go through a command queue and are tagged with a generation
+    number. stop() bumps the generation and cancels the running search (the
+    engine receives "stop" right away), so a result that belongs to an
+    abandoned request is dropped instead of reaching the board.
+
+    Callbacks run on the service thread; GUI code should hand them over to
+    Tk with root.after.
+
+    engine_path may also be a tcp://host:port address of an EngineServer
+    (remote_engine.py); the service then talks to the engine over one
+    persistent connection instead of a pipe.
+
+    Every search is supervised. A search that runs grace seconds past its
+    deadline is stopped, and an engine that does not even answer isready
+    after that (or that crashed) is killed and respawned with the same
+    options. The search is then replayed on the fresh process, up to
+    max_restarts times. timeouts, crashes and restarts count what happened.
+    """
+
+    def __init__(self, engine_path, name="Engine", grace=2.0, stop_timeout=1.0, max_restarts=2):
+        self.engine_path = engine_path
+        self.name = name
+        self.grace = grace
+        self.stop_timeout = stop_timeout
+        self.max_restarts = max_restarts
+        self.timeouts = 0
+        self.crashes = 0
+        self.restarts = 0
+        self._respawning = None
+        self.generation = 0
+        self.ready = False
+        self.transport = None
+        self.protocol = None
+        self.options = {}
+        self.resource_options = {}
+        self.cpus = None
+        self.ponder_move = None
+        self.game = object()
+        self.last_used = time.monotonic()
+        self._lock = threading.Lock()
+        self._loop = asyncio.new_event_loop()
+        self._queue = None
+        self._current = None
+        self._thread = threading.Thread(target=self._run_loop, name=f"{name} engine service", daemon=True)
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    def start(self, on_ready=None, on_error=None):
+        """Start the loop thread and the engine process in the background"""
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._open(on_ready, on_error), self._loop)
+
+    async def _open(self, on_ready, on_error):
+        try:
+            self.transport, self.protocol = await open_uci(self.engine_path)
+        except Exception as e:
+            if on_error:
+                on_error(e)
+            return
+        if self.cpus:
+            pin_process(self.transport.get_pid(), self.cpus)
+
+        self._queue = asyncio.Queue()
+        self._loop.create_task(self._worker())
+        self.ready = True
+        if on_ready:
+            on_ready(self)
+
+    async def _worker(self):
+        while True:
+            command = await self._queue.get()
+            if command is None:
+                break
+
+            generation, search, deadline, on_result, on_error, on_stopped = command
+            if generation != self.generation:
+                # Stopped before it even started
+                if on_stopped:
+                    on_stopped(generation)
+                continue
+
+            self._current = asyncio.ensure_future(self._supervise(search, deadline))
+            try:
+                result = await self._current
+            except asyncio.CancelledError:
+                if on_stopped:
+                    on_stopped(generation)
+                continue
+            except Exception as e:
+                if generation != self.generation:
+                    if on_stopped:
+                        on_stopped(generation)
+                elif on_error:
+                    on_error(e, generation)
+                continue
+            finally:
+                self._current = None
+                self.last_used = time.monotonic()
+
+            if generation != self.generation:
+                if on_stopped:
+                    on_stopped(generation)
+            elif on_result:
+                on_result(result, generation)
+
+    async def _supervise(self, search, deadline):
+        """Run search, replaying it on a fresh process if the engine hangs or crashes"""
+        for attempt in range(self.max_restarts + 1):
+            last_attempt = attempt == self.max_restarts
+            if self._respawning:
+                # A restart for an abandoned search is still under way
+                await asyncio.shield(self._respawning)
+            try:
+                if deadline is None:
+                    return await search()
+                return await asyncio.wait_for(search(), deadline + self.grace)
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                # wait_for cancelled the search, which sends "stop"
+                if not await self._responsive():
+                    await self._restart()
+                if last_attempt:
+                    raise chess.engine.EngineError(f"{self.name} missed its move deadline {attempt + 1} times in a row")
+            except chess.engine.EngineTerminatedError:
+                self.crashes += 1
+                # Even when giving up, leave a working process for the next request
+                await self._restart()
+                if last_attempt:
+                    raise
+
+    async def _responsive(self):
+        # isready is only answered once the stopped search has sent its bestmove.
+        # The ping is left pending rather than cancelled; killing the process ends it.
+        ping = asyncio.ensure_future(self.protocol.ping())
+        ping.add_done_callback(lambda task: task.cancelled() or task.exception())
+        done, _ = await asyncio.wait({ping}, timeout=self.stop_timeout)
+        return ping in done and ping.exception() is None
+
+    async def _restart(self):
+        # Shielded: a stop() during the restart abandons the search, not the new process
+        if not self._respawning:
+            self._respawning = asyncio.ensure_future(self._respawn())
+        await asyncio.shield(self._respawning)
+
+    async def _respawn(self):
+        """Kill the engine process and start a new one with the same options"""
+        self.restarts += 1
+        self.ponder_move = None
+        try:
+            try:
+                self.transport.kill()
+            except (ProcessLookupError, OSError):
+                pass
+            self.transport.close()
+
+            self.transport, self.protocol = await open_uci(self.engine_path)
+            if self.cpus:
+                pin_process(self.transport.get_pid(), self.cpus)
+            options, self.options = self.options, {}
+            await self._push_options(options)
+        finally:
+            self._respawning = None
+
+    @property
+    def health(self):
+        """Watchdog counters, e.g. for a stats display"""
+        return {"timeouts": self.timeouts, "crashes": self.crashes, "restarts": self.restarts}
+
+    @property
+    def engine_id(self):
+        """Engine name as reported by "id name", used to keep per-engine caches apart"""
+        if self.protocol:
+            return self.protocol.id.get("name", str(self.engine_path))
+        return str(self.engine_path)
+
+    @property
+    def busy(self):
+        """True while a search (or ponder search) is running"""
+        return self._current is not None or self.ponder_move is not None
+
+    def new_game(self):
+        """Make the next search start with "ucinewgame" on the same process"""
+        self.game = object()
+
+    def is_current(self, generation):
+        return generation == self.generation
+
+    def submit(self, search, on_result=None, on_error=None, deadline=None, on_stopped=None):
+        """Queue a coroutine function to run against the engine; returns its generation
+
+        deadline (seconds, plus grace) arms the watchdog for this search.
+        on_stopped(generation) is called instead of on_result/on_error when
+        stop() drops the request, queued or running.
+        """
+        if not self.ready:
+            raise RuntimeError(f"{self.name} engine is not running")
+        with self._lock:
+            generation = self.generation
+        self.last_used = time.monotonic()
+        self._loop.call_soon_threadsafe(
+            self._queue.put_nowait, (generation, search, deadline, on_result, on_error, on_stopped)
+        )
+        return generation
+
+    def play(self, board, limit, options=None, ponder=False, on_result=None, on_error=None):
+        """Ask for a move in a copy of board; on_result(PlayResult, generation)
+
+        With ponder=True the engine keeps searching the expected reply after
+        answering. If the next play() comes with that exact position python-chess
+        sends "ponderhit"; any other position stops the ponder search first.
+        """
+        board = board.copy()
+        game = self.game
+
+        async def search():
+            self.ponder_move = None
+            await self._push_options(options or {})
+            result = await self.protocol.play(board, limit, game=game, info=chess.engine.INFO_ALL, ponder=ponder)
+            if ponder:
+                self.ponder_move = result.ponder
+            return result
+
+        return self.submit(search, on_result, on_error, search_deadline(limit, board.turn))
+
+    def evaluate(self, board, limit, on_result=None, on_error=None, on_stopped=None):
+        """Analyse a copy of board to limit; on_result(InfoDict, generation)"""
+        board = board.copy()
+        game = self.game
+
+        async def search():
+            self.ponder_move = None
+            await self._push_options({})
+            return await self.protocol.analyse(board, limit, game=game, info=chess.engine.INFO_SCORE | chess.engine.INFO_PV)
+
+        return self.submit(search, on_result, on_error, search_deadline(limit, board.turn), on_stopped)
+
+    def analyse(self, board, multipv=1, options=None, on_info=None, on_error=None):
+        """Analyse a copy of board without a limit until stop(); returns the generation
+
+        on_info(info, generation) is called on the service thread for every
+        info line the engine sends.
+        """
+        board = board.copy()
+        game = self.game
+        generation = self.generation
+
+        async def search():
+            self.ponder_move = None
+            await self._push_options(options or {})
+            # Leaving the block (including cancellation by stop()) sends "stop"
+            with await self.protocol.analysis(board, multipv=multipv, game=game, info=chess.engine.INFO_ALL) as analysis:
+                async for info in analysis:
+                    if on_info and self.is_current(generation):
+                        on_info(info, generation)
+            return analysis.info
+
+        return self.submit(search, on_error=on_error)
+
+    def set_resources(self, options, cpus=None):
+        """Threads/Hash from a ResourceScheduler, sent before the next search
+
+        cpus pins the engine process (now, or as soon as it is running) to
+        that CPU set. Remote engines are left alone: this machine's cores say
+        nothing about the server's.
+        """
+        if is_remote(self.engine_path):
+            return
+        self.resource_options = dict(options)
+        if cpus and cpus != self.cpus:
+            self.cpus = set(cpus)
+            if self.transport:
+                pin_process(self.transport.get_pid(), self.cpus)
+
+    async def _push_options(self, options):
+        # Only send setoption for values that differ from what the engine already has
+        options = fit_options({**self.resource_options, **options}, self.protocol.options)
+        changed = {
+            name: value for name, value in options.items()
+            if self.options.get(name) != value
+        }
+        if changed:
+            await self.protocol.configure(changed)
+            self.options.update(changed)
+
+    def stop(self):
+        """Invalidate queued and running requests and stop the current search"""
+        with self._lock:
+            self.generation += 1
+        if self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._cancel_current)
+
+    def _cancel_current(self):
+        if self._current and not self._current.done():
+            self._current.cancel()
+        elif self.ponder_move:
+            self.ponder_move = None
+            self._loop.create_task(self._stop_pondering())
+
+    async def _stop_pondering(self):
+        # Any new command makes python-chess send "stop" to the ponder search
+        try:
+            await self.protocol.ping()
+        except chess.engine.EngineError:
+            pass
+
+    def quit(self, timeout=2.0):
+        """Stop searching, quit the engine and shut the loop thread down"""
+        self.stop()
+        self.ready = False
+        if not self._loop.is_running():
+            return
+
+        future = asyncio.run_coroutine_threadsafe(self._quit(), self._loop)
+        try:
+            future.result(timeout)
+        except Exception:
+            if self.transport:
+                self.transport.close()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+    async def _quit(self):
+        if self._queue:
+            self._queue.put_nowait(None)
+        if self.protocol:
+            await self.protocol.quit()
@@ -0,0 +1,171 @@
+import collections
+import json
+import mmap
+import os
+import struct
+
+import chess
+
+
+# Data file: magic, then records of
+#   u32 record length | u16 header length | JSON headers | u16 FEN length | FEN | u32 plies | u16 moves
+# Index file (<data>.idx): magic, then one u64 record offset per game.
+# Records are written before their index entry, so a reader never sees a half-written game.
+DATA_MAGIC = b"CGA1"
+INDEX_MAGIC = b"CGI1"
+INDEX_ENTRY = struct.Struct("<Q")
+RECORD_PREFIX = struct.Struct("<I")
+
+ArchivedGame = collections.namedtuple("ArchivedGame", ["headers", "start_fen", "moves"])
+
+
+def encode_move(move):
+    """Pack a move into 16 bits: from (6) | to (6) | promotion piece type (3)"""
+    return move.from_square | (move.to_square << 6) | ((move.promotion or 0) << 12)
+
+
+def decode_move(code):
+    promotion = (code >> 12) & 0x7
+    return chess.Move(code & 0x3f, (code >> 6) & 0x3f, promotion or None)
+
+
+def encode_game(headers, moves, start_fen=None):
+    header_bytes = json.dumps(dict(headers), separators=(",", ":")).encode("utf-8")
+    fen_bytes = (start_fen or "").encode("ascii")
+    codes = [encode_move(move) for move in moves]
+    body = b"".join([
+        struct.pack("<H", len(header_bytes)), header_bytes,
+        struct.pack("<H", len(fen_bytes)), fen_bytes,
+        struct.pack("<I", len(codes)), struct.pack(f"<{len(codes)}H", *codes),
+    ])
+    return RECORD_PREFIX.pack(len(body)) + body
+
+
+def decode_game(buffer, offset):
+    (length,) = RECORD_PREFIX.unpack_from(buffer, offset)
+    pos = offset + RECORD_PREFIX.size
+
+    (header_length,) = struct.unpack_from("<H", buffer, pos)
+    pos += 2
+    headers = json.loads(bytes(buffer[pos:pos + header_length]).decode("utf-8"))
+    pos += header_length
+
+    (fen_length,) = struct.unpack_from("<H", buffer, pos)
+    pos += 2
+    start_fen = bytes(buffer[pos:pos + fen_length]).decode("ascii") or None
+    pos += fen_length
+
+    (plies,) = struct.unpack_from("<I", buffer, pos)
+    pos += 4
+    codes = struct.unpack_from(f"<{plies}H", buffer, pos)
+    return ArchivedGame(headers, start_fen, [decode_move(code) for code in codes])
+
+
+class GameArchive:
+    """Append-only binary game store with an O(1) memory-mapped index
+
+    Moves take two bytes each. Any game can be opened by number without
+    reading the rest of the file; both files are mapped read-only and the
+    maps are refreshed when another writer has appended games. The files
+    are created by the first append; reading a missing archive raises
+    FileNotFoundError.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.index_path = path + ".idx"
+        self._data_map = None
+        self._index_map = None
+
+        for file_path, magic in self._files():
+            if os.path.exists(file_path) and os.path.getsize(file_path) > 0:
+                with open(file_path, 'rb') as f:
+                    if f.read(len(magic)) != magic:
+                        raise ValueError(f"Not a game archive: {file_path}")
+
+    def _files(self):
+        return ((self.path, DATA_MAGIC), (self.index_path, INDEX_MAGIC))
+
+    def __len__(self):
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"No game archive at {self.path}")
+        return max(0, (os.path.getsize(self.index_path) - len(INDEX_MAGIC)) // INDEX_ENTRY.size)
+
+    def __getitem__(self, number):
+        offset = self._offset(number)
+        return decode_game(self._data_map, offset)
+
+    def headers(self, number):
+        """Decode only the headers of game number"""
+        offset = self._offset(number) + RECORD_PREFIX.size
+        (header_length,) = struct.unpack_from("<H", self._data_map, offset)
+        return json.loads(bytes(self._data_map[offset + 2:offset + 2 + header_length]).decode("utf-8"))
+
+    def _offset(self, number):
+        count = len(self)
+        if number < 0:
+            number += count
+        if not 0 <= number < count:
+            raise IndexError(f"Game {number} out of range (archive has {count})")
+
+        self._refresh_maps(count)
+        (offset,) = INDEX_ENTRY.unpack_from(self._index_map, len(INDEX_MAGIC) + number * INDEX_ENTRY.size)
+        return offset
+
+    def __iter__(self):
+        for number in range(len(self)):
+            yield self[number]
+
+    def _refresh_maps(self, count):
+        index_size = len(INDEX_MAGIC) + count * INDEX_ENTRY.size
+        if self._index_map is not None and len(self._index_map) >= index_size:
+            return
+
+        self.close()
+        with open(self.index_path, 'rb') as f:
+            self._index_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        with open(self.path, 'rb') as f:
+            self._data_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def append(self, headers, moves, start_fen=None):
+        """Append one game; returns its number"""
+        for file_path, magic in self._files():
+            if not os.path.exists(file_path) or os.path.getsize(file_path) == 0:
+                with open(file_path, 'wb') as f:
+                    f.write(magic)
+
+        record = encode_game(headers, moves, start_fen)
+        with open(self.path, 'ab') as f:
+            offset = f.tell()
+            f.write(record)
+        with open(self.index_path, 'ab') as f:
+            f.write(INDEX_ENTRY.pack(offset))
+            number = (f.tell() - len(INDEX_MAGIC)) // INDEX_ENTRY.size - 1
+        return number
+
+    def append_board(self, board, headers):
+        """Append the game played on board (from its root position)"""
+        root = board.root()
+        start_fen = None if root.fen() == chess.STARTING_FEN else root.fen()
+        return self.append(headers, board.move_stack, start_fen)
+
+    def board_at(self, number):
+        """Return a board with game number replayed on it"""
+        game = self[number]
+        board = chess.Board(game.start_fen) if game.start_fen else chess.Board()
+        for move in game.moves:
+            board.push(move)
+        return board
+
+    def close(self):
+        for name in ("_index_map", "_data_map"):
+            mapped = getattr(self, name)
+            if mapped is not None:
+                mapped.close()
+                setattr(self, name, None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,154 @@
+import collections
+import threading
+
+import chess
+import chess.engine
+
+
+MATE_SCORE = 10000
+# Evaluations are capped before comparing, so a won position that stays won
+# does not count as a blunder just because a mate got longer
+EVAL_CAP = 1000
+# Centipawn loss for the side that moved, most severe first
+MARKS = ((300, "??"), (100, "?"), (50, "?!"))
+
+
+def white_cp(info):
+    """White's score in centipawns (mates as +-MATE_SCORE), or None"""
+    score = info.get("score")
+    if score is None:
+        return None
+    return score.white().score(mate_score=MATE_SCORE)
+
+
+def classify(loss):
+    """Mark for a move that lost loss centipawns: "??", "?", "?!" or "" """
+    for threshold, mark in MARKS:
+        if loss >= threshold:
+            return mark
+    return ""
+
+
+def terminal_info(board):
+    """Evaluation of a position without legal moves: mated or stalemate"""
+    if board.is_checkmate():
+        return {"score": chess.engine.PovScore(chess.engine.Mate(0), board.turn)}
+    return {"score": chess.engine.PovScore(chess.engine.Cp(0), board.turn)}
+
+
+class GameReview:
+    """Analyses every position of a game on several engine services at once
+
+    Positions come from a shared queue, and each service takes the next one
+    as soon as it finishes. Uneven search times therefore never leave a
+    process idle. on_position(index, info) runs on a service thread for each
+    of the len(move_stack) + 1 positions, in whatever order they finish.
+    A search dropped by service.stop() (the GUI stops its play engines when
+    the user navigates) is put back on the queue for the same service.
+    """
+
+    def __init__(self, board, services, limit, on_position, on_error=None):
+        self.moves = list(board.move_stack)
+        self.boards = [board.root()]
+        for move in self.moves:
+            position = self.boards[-1].copy()
+            position.push(move)
+            self.boards.append(position)
+
+        self.services = list(services)
+        self.limit = limit
+        self.on_position = on_position
+        self.on_error = on_error
+        self.results = {}
+        self.cancelled = False
+        self._pending = collections.deque(range(len(self.boards)))
+        self._lock = threading.Lock()
+
+    def start(self):
+        for service in self.services:
+            self._next(service)
+
+    def _next(self, service):
+        with self._lock:
+            if self.cancelled or not self._pending:
+                return
+            index = self._pending.popleft()
+
+        board = self.boards[index]
+        # Mate and stalemate need no search (and engines answer them inconsistently)
+        if not any(board.generate_legal_moves()):
+            self._finished(service, index, terminal_info(board))
+            return
+        try:
+            service.evaluate(
+                board,
+                self.limit,
+                on_result=lambda info, generation: self._finished(service, index, info),
+                on_error=lambda error, generation: self._failed(error),
+                on_stopped=lambda generation: self._requeue(service, index)
+            )
+        except RuntimeError as e:
+            # The service was shut down under the review
+            self._failed(e)
+
+    def _finished(self, service, index, info):
+        with self._lock:
+            if self.cancelled:
+                return
+            self.results[index] = info
+        self.on_position(index, info)
+        self._next(service)
+
+    def _requeue(self, service, index):
+        with self._lock:
+            if self.cancelled:
+                return
+            self._pending.appendleft(index)
+        self._next(service)
+
+    def _failed(self, error):
+        self.cancel()
+        if self.on_error:
+            self.on_error(error)
+
+    @property
+    def done(self):
+        return len(self.results) == len(self.boards)
+
+    def cancel(self):
+        """Drop the remaining positions and stop the searches in progress"""
+        with self._lock:
+            self.cancelled = True
+            self._pending.clear()
+        for service in self.services:
+            service.stop()
+
+    def annotate(self, ply):
+        """Review of move ply (1-based) once the positions before and after it are analysed
+
+        Returns a dict with the score after the move, the engine's best move
+        (SAN) in the position before it, the centipawn loss and the mark, or
+        None while either position is still being analysed.
+        """
+        before, after = self.results.get(ply - 1), self.results.get(ply)
+        if before is None or after is None:
+            return None
+
+        board = self.boards[ply - 1]
+        move = self.moves[ply - 1]
+        pv = before.get("pv")
+        best = pv[0] if pv else None
+
+        loss = 0
+        cp_before, cp_after = white_cp(before), white_cp(after)
+        if cp_before is not None and cp_after is not None and move != best:
+            cp_before = max(-EVAL_CAP, min(EVAL_CAP, cp_before))
+            cp_after = max(-EVAL_CAP, min(EVAL_CAP, cp_after))
+            loss = max(0, cp_before - cp_after if board.turn == chess.WHITE else cp_after - cp_before)
+
+        return {
+            "score": after.get("score"),
+            "best": board.san(best) if best and best in board.legal_moves else None,
+            "loss": loss,
+            "mark": classify(loss),
+        }
@@ -0,0 +1,90 @@
+import collections
+import threading
+
+
+def format_score(score):
+    """Score from White's point of view, e.g. "+0.35" or "#-3" """
+    white = score.white()
+    if white.is_mate():
+        return f"#{white.mate()}"
+    return f"{white.score() / 100:+.2f}"
+
+
+def format_line(board, info, max_moves=8):
+    """One MultiPV line such as "+0.35  d18  e4 e5 Nf3" for board"""
+    score = format_score(info["score"]) if "score" in info else "?"
+    pv = info.get("pv", [])[:max_moves]
+    try:
+        moves = board.variation_san(pv) if pv else ""
+    except ValueError:
+        # A line from a position the display has already moved past
+        moves = ""
+    return f"{score:>6}  d{info.get('depth', 0):<2}  {moves}"
+
+
+class AnalysisFeed:
+    """Ring buffer between an engine thread and a fixed-rate display
+
+    The engine thread push()es every info line; the display drain()s at its
+    own pace and only the newest line per MultiPV slot survives, so hundreds
+    of info lines per second cost one redraw per tick. Lines from an older
+    analysis (another generation) are dropped.
+    """
+
+    def __init__(self, capacity=256):
+        self._buffer = collections.deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self.generation = None
+        self.board = None
+        self.lines = {}
+        self.stats = {}
+        self.received = 0
+
+    def reset(self, generation=None, board=None):
+        """Start collecting lines for a new analysis of board"""
+        with self._lock:
+            self._buffer.clear()
+            self.generation = generation
+            self.board = board.copy() if board is not None else None
+            self.lines = {}
+            self.stats = {}
+            self.received = 0
+
+    def push(self, info, generation):
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._buffer.append(info)
+            self.received += 1
+
+    def drain(self):
+        """Fold buffered info into lines/stats; returns True if anything changed"""
+        with self._lock:
+            if not self._buffer:
+                return False
+            pending = list(self._buffer)
+            self._buffer.clear()
+
+        for info in pending:
+            if "pv" in info:
+                self.lines[info.get("multipv", 1)] = info
+            for key in ("depth", "seldepth", "nodes", "nps", "hashfull", "time"):
+                if key in info:
+                    self.stats[key] = info[key]
+        return True
+
+    def format_lines(self, max_moves=8):
+        """Display text for each MultiPV slot in rank order"""
+        return [
+            f"{rank}. {format_line(self.board, self.lines[rank], max_moves)}"
+            for rank in sorted(self.lines)
+        ]
+
+    def format_stats(self):
+        if not self.stats:
+            return "Analysis: waiting for engine..."
+        nps = self.stats.get("nps", 0)
+        return (
+            f"Depth {self.stats.get('depth', 0)}/{self.stats.get('seldepth', 0)}  "
+            f"{nps / 1000:.0f} kN/s  {self.stats.get('nodes', 0):,} nodes"
+        )
@@ -0,0 +1,505 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import multiprocessing.util
+import random
+import sys
+import time
+
+import chess
+import chess.engine
+import chess.pgn
+
+from chess_clock import ChessClock, format_time_control, parse_time_control
+from engine_service import search_deadline
+from game_archive import GameArchive
+from game_review import white_cp
+from opening_book import OpeningBook
+from outcome_tracker import OutcomeTracker
+from remote_engine import is_remote, open_simple_engine
+from resource_scheduler import ResourceScheduler, fit_options
+from sprt import SPRT
+from tablebase import EndgameTablebase
+
+
+# Per-worker engine pair, opened once by the pool initializer
+_worker_engines = {}
+
+
+def parse_engine_options(pairs):
+    """Turn a list of "Name=Value" strings into a UCI options dict"""
+    options = {}
+    for pair in pairs or []:
+        if "=" not in pair:
+            raise ValueError(f"Engine option must look like Name=Value: {pair}")
+        name, value = pair.split("=", 1)
+        options[name.strip()] = value.strip()
+    return options
+
+
+def load_openings(path):
+    """Read openings from a file: one FEN/EPD or one line of UCI moves per line"""
+    if not path:
+        return [chess.Board()]
+
+    openings = []
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+
+            if "/" in line:
+                # FEN or EPD position (EPD opcodes are ignored)
+                board = chess.Board()
+                try:
+                    board.set_fen(line)
+                except ValueError:
+                    board.set_epd(line)
+            else:
+                board = chess.Board()
+                for move_uci in line.split():
+                    board.push_uci(move_uci)
+            openings.append(board)
+
+    if not openings:
+        raise ValueError(f"No openings found in {path}")
+    return openings
+
+
+def build_schedule(num_games, openings):
+    """Pair every opening with both colour assignments, cycling through the book"""
+    schedule = []
+    for game_index in range(num_games):
+        opening = openings[(game_index // 2) % len(openings)]
+        schedule.append({
+            "index": game_index,
+            "fen": opening.root().fen(),
+            "moves": [move.uci() for move in opening.move_stack],
+            "engine1_white": game_index % 2 == 0,
+        })
+    return schedule
+
+
+def open_engine(path, options, resources=None):
+    """Start a UCI engine or connect to a tcp:// engine server
+
+    resources (scheduled Threads/Hash) apply to local engines that support them.
+    """
+    engine = open_simple_engine(path)
+    if is_remote(path):
+        # The server shares out its own machine's cores
+        resources = None
+    options = dict(fit_options(resources or {}, engine.options), **options)
+    if options:
+        engine.configure(options)
+    return engine
+
+
+def check_engines(paths):
+    """Start and quit each distinct engine once, raising if one cannot be started
+
+    Run before the pool is created: a failure inside a worker would otherwise
+    only surface as a game error (or, in an initializer, an endless respawn).
+    """
+    for path in dict.fromkeys(paths):
+        open_simple_engine(path).quit()
+
+
+def _init_worker(settings, events=None):
+    """Pool initializer: nothing here may raise, or the pool respawns the worker forever
+
+    The engine pair is started on the worker's first task and kept for its
+    lifetime (see _open_worker_engines). events (a multiprocessing.Queue)
+    receives live progress of every game, see spectator.SpectatorView.
+    """
+    _worker_engines["settings"] = settings
+    _worker_engines["events"] = events
+    multiprocessing.util.Finalize(None, _close_worker_engines, exitpriority=16)
+
+
+def _open_worker_engines():
+    """Start whatever the worker is missing: both engines, the book and the tablebase"""
+    settings = _worker_engines["settings"]
+    resources = settings.get("resources")
+    for key in ("engine1", "engine2"):
+        if _worker_engines.get(key) is None:
+            _worker_engines[key] = open_engine(settings[key], settings["options" + key[-1]], resources)
+    if "book" not in _worker_engines:
+        _worker_engines["book"] = (
+            OpeningBook(settings["book"], settings["book_selection"], settings["book_depth"])
+            if settings["book"] else None
+        )
+    if "tablebase" not in _worker_engines:
+        _worker_engines["tablebase"] = EndgameTablebase(settings["syzygy"]) if settings["syzygy"] else None
+
+
+def _close_worker_engines():
+    for key in ("engine1", "engine2"):
+        engine = _worker_engines.pop(key, None)
+        if engine:
+            try:
+                engine.quit()
+            except Exception:
+                pass
+
+
+def _restart_engine(engine):
+    """Drop a crashed or hung worker engine; the next task starts a new process with the same options"""
+    for key in ("engine1", "engine2"):
+        if _worker_engines.get(key) is engine:
+            del _worker_engines[key]
+            try:
+                # Kills the process if it is still running
+                engine.close()
+            except Exception:
+                pass
+
+
+def watched_play(engine, board, limit, grace=None):
+    """engine.play() with a hard deadline of the move's time plus grace seconds
+
+    An engine that overruns it is killed and TimeoutError raised, so a hung
+    process cannot stall the worker (SimpleEngine has no timeout for clock
+    limits). The deadline runs on the engine's own event loop, so the search
+    is cancelled there before the process is killed.
+    """
+    deadline = search_deadline(limit, board.turn)
+    if grace is None or deadline is None:
+        return engine.play(board, limit, info=chess.engine.INFO_SCORE)
+
+    async def play():
+        try:
+            return await asyncio.wait_for(
+                engine.protocol.play(board, limit, info=chess.engine.INFO_SCORE), deadline + grace
+            )
+        except asyncio.TimeoutError:
+            engine.transport.kill()
+            raise TimeoutError(f"engine missed its move deadline by {grace}s") from None
+
+    return asyncio.run_coroutine_threadsafe(play(), engine.protocol.loop).result()
+
+
+def play_game(white, black, board, limit, max_plies=0, book=None, rng=None, tablebase=None, clock=None, grace=None,
+              on_move=None):
+    """Play one game between two open engines, returning (board, result, termination)
+
+    With a ChessClock the engines get both clocks instead of limit and a side
+    whose flag falls loses on time. grace arms a per-move watchdog (see
+    watched_play). on_move(board, info) is called after every move, with the
+    engine's info (empty for book and tablebase moves).
+    """
+    # Claimable draws end the game; the tracker avoids re-walking the move stack every ply
+    tracker = OutcomeTracker(board, claim_draw=True)
+    if clock:
+        clock.reset()
+        clock.start(board.turn)
+    while True:
+        if tracker.outcome:
+            return board, tracker.result(), tracker.outcome.termination.name.lower()
+
+        if max_plies and board.ply() >= max_plies:
+            return board, "1/2-1/2", "max_plies"
+
+        book_move = book.pick(board, rng) if book else None
+        if book_move:
+            if clock:
+                clock.press(board.turn)
+            tracker.push(book_move)
+            if on_move:
+                on_move(board, {})
+            continue
+
+        probe = tablebase.best_move(board) if tablebase else None
+        if probe:
+            if clock:
+                clock.press(board.turn)
+            tracker.push(probe[0])
+            if on_move:
+                on_move(board, {})
+            continue
+
+        engine = white if board.turn == chess.WHITE else black
+        result = watched_play(engine, board, clock.limit(board.turn) if clock else limit, grace)
+        if clock:
+            if clock.flagged(board.turn):
+                return board, clock.flag_result(board), "time_forfeit"
+            clock.press(board.turn)
+        if result.resigned or result.move is None:
+            return board, ("0-1" if board.turn == chess.WHITE else "1-0"), "resignation"
+
+        tracker.push(result.move)
+        if on_move:
+            on_move(board, result.info)
+
+
+def _run_task(task):
+    settings = _worker_engines["settings"]
+    _open_worker_engines()
+    engine1 = _worker_engines["engine1"]
+    engine2 = _worker_engines["engine2"]
+    white, black = (engine1, engine2) if task["engine1_white"] else (engine2, engine1)
+
+    board = chess.Board(task["fen"])
+    for move_uci in task["moves"]:
+        board.push_uci(move_uci)
+
+    # Both games of an opening pair draw the same book line
+    rng = random.Random(task["index"] // 2)
+    clock = ChessClock(*settings["time_control"]) if settings["time_control"] else None
+
+    # Read before the game: a restarted engine's old handle is closed
+    white_name = white.id.get("name", "engine")
+    black_name = black.id.get("name", "engine")
+
+    events = _worker_engines.get("events")
+    on_move = None
+    if events is not None:
+        events.put(("start", task["index"], white_name, black_name, board.fen()))
+
+        def on_move(board, info):
+            clocks = (clock.time_left(chess.WHITE), clock.time_left(chess.BLACK)) if clock else None
+            events.put(("move", task["index"], board.peek().uci(), white_cp(info), clocks))
+
+    start = time.time()
+    try:
+        board, result, termination = play_game(
+            white, black, board,
+            chess.engine.Limit(time=settings["time_limit"]),
+            settings["max_plies"],
+            _worker_engines["book"],
+            rng,
+            _worker_engines["tablebase"],
+            clock,
+            settings.get("grace"),
+            on_move
+        )
+    except (chess.engine.EngineError, TimeoutError) as e:
+        # Count a crashed, hung or misbehaving engine as a loss for the side to move,
+        # and give the next game a fresh process
+        result = "0-1" if board.turn == chess.WHITE else "1-0"
+        termination = "engine_timeout" if isinstance(e, TimeoutError) else f"engine_error: {e}"
+        _restart_engine(white if board.turn == chess.WHITE else black)
+    if events is not None:
+        events.put(("end", task["index"], result, termination))
+
+    white_options, black_options = (
+        (settings["options1"], settings["options2"]) if task["engine1_white"]
+        else (settings["options2"], settings["options1"])
+    )
+
+    game = chess.pgn.Game.from_board(board)
+    game.headers["Event"] = settings["event"]
+    game.headers["Round"] = str(task["index"] + 1)
+    game.headers["White"] = white_name
+    game.headers["Black"] = black_name
+    game.headers["Result"] = result
+    game.headers["Termination"] = termination
+    if settings["time_control"]:
+        game.headers["TimeControl"] = format_time_control(*settings["time_control"])
+
+    return {
+        "index": task["index"],
+        "white": white_name,
+        "black": black_name,
+        "engine1_white": task["engine1_white"],
+        "result": result,
+        "termination": termination,
+        "plies": board.ply(),
+        "duration": round(time.time() - start, 3),
+        "pgn": str(game),
+        "start_fen": None if board.root().fen() == chess.STARTING_FEN else board.root().fen(),
+        "moves": [move.uci() for move in board.move_stack],
+        "headers": dict(
+            game.headers,
+            TimeControl=game.headers.get("TimeControl", f"{settings['time_limit']}s/move"),
+            WhiteOptions=white_options,
+            BlackOptions=black_options,
+        ),
+    }
+
+
+def engine1_score(record):
+    """Score of a finished game from engine 1's point of view"""
+    if record["result"] == "1/2-1/2":
+        return 0.5
+    white_won = record["result"] == "1-0"
+    return 1.0 if white_won == record["engine1_white"] else 0.0
+
+
+def run_match(settings, schedule, concurrency, on_result, events=None):
+    """Play the schedule across a pool of workers, calling on_result as games finish
+
+    A true return value from on_result stops the match early; games still
+    being played are abandoned. events is passed on to the workers (see
+    _init_worker).
+    """
+    with multiprocessing.Pool(concurrency, initializer=_init_worker, initargs=(settings, events)) as pool:
+        for record in pool.imap_unordered(_run_task, schedule):
+            if on_result(record):
+                pool.terminate()
+                return
+        pool.close()
+        pool.join()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="chessgui4.py match",
+        description="Play a headless engine-vs-engine match across a process pool"
+    )
+    parser.add_argument("--engine1", required=True, help="Path to the first UCI engine, or tcp://host:port")
+    parser.add_argument("--engine2", help="Path (or tcp:// address) of the second UCI engine (defaults to engine1)")
+    parser.add_argument("--option1", action="append", default=[], help="UCI option for engine1 as Name=Value")
+    parser.add_argument("--option2", action="append", default=[], help="UCI option for engine2 as Name=Value")
+    parser.add_argument("--games", type=int, default=2, help="Number of games to play")
+    parser.add_argument("--concurrency", type=int, default=multiprocessing.cpu_count(), help="Number of parallel workers")
+    parser.add_argument("--time", type=float, default=0.1, help="Thinking time per move in seconds")
+    parser.add_argument("--tc", help="Game clock instead of --time, e.g. 60+0.6 or 40/300 (seconds)")
+    parser.add_argument("--openings", help="File with one FEN/EPD or UCI move line per opening")
+    parser.add_argument("--book", help="Polyglot opening book (.bin) played before engines search")
+    parser.add_argument("--book-depth", type=int, default=20, help="Maximum book depth in plies")
+    parser.add_argument("--book-selection", choices=("weighted", "random", "best"), default="weighted",
+                        help="How to choose between book moves")
+    parser.add_argument("--syzygy", help="Syzygy tablebase directory; covered endgames are played without search")
+    parser.add_argument("--max-plies", type=int, default=0, help="Adjudicate a draw after this many plies (0 = off)")
+    parser.add_argument("--pgn", help="Append finished games to this PGN file")
+    parser.add_argument("--results", help="Append one JSON result line per game to this file")
+    parser.add_argument("--archive", help="Append finished games to this binary game archive (.cga)")
+    parser.add_argument("--event", default="Engine Match", help="PGN Event header")
+    parser.add_argument("--sprt", action="store_true",
+                        help="Stop as soon as an SPRT on engine1 vs engine2 accepts H0 or H1 (--games is the cap)")
+    parser.add_argument("--elo0", type=float, default=0.0, help="SPRT H0: engine1 is elo0 stronger")
+    parser.add_argument("--elo1", type=float, default=5.0, help="SPRT H1: engine1 is elo1 stronger")
+    parser.add_argument("--alpha", type=float, default=0.05, help="SPRT false positive rate")
+    parser.add_argument("--beta", type=float, default=0.05, help="SPRT false negative rate")
+    parser.add_argument("--grace", type=float, default=5.0,
+                        help="Seconds past a move's time before a hung engine is killed and restarted")
+    parser.add_argument("--auto-resources", action="store_true",
+                        help="Split the cores and memory between workers as Threads/Hash (--option values win)")
+    parser.add_argument("--spectate", action="store_true", help="Watch the running games in a window, one board per worker")
+    parser.add_argument("--fps", type=int, default=10, help="Frame rate cap of the --spectate window")
+    args = parser.parse_args(argv)
+
+    settings = {
+        "engine1": args.engine1,
+        "engine2": args.engine2 or args.engine1,
+        "options1": parse_engine_options(args.option1),
+        "options2": parse_engine_options(args.option2),
+        "time_limit": args.time,
+        "time_control": parse_time_control(args.tc) if args.tc else None,
+        "max_plies": args.max_plies,
+        "event": args.event,
+        "book": args.book,
+        "book_depth": args.book_depth,
+        "book_selection": args.book_selection,
+        "syzygy": args.syzygy,
+        "grace": args.grace,
+    }
+    schedule = build_schedule(args.games, load_openings(args.openings))
+    concurrency = max(1, min(args.concurrency, args.games))
+    if args.auto_resources and not (is_remote(settings["engine1"]) and is_remote(settings["engine2"])):
+        # The two engines of a worker take turns, so each worker is one slot of cores
+        # (the smallest share for all, so uneven splits never oversubscribe)
+        plan = ResourceScheduler(reserve_cpus=0).plan(concurrency, 2 * concurrency)
+        settings["resources"] = min((assignment["options"] for assignment in plan), key=lambda options: options["Threads"])
+        print("Resources per engine: " + ", ".join(f"{name} {value}" for name, value in settings["resources"].items()), flush=True)
+
+    try:
+        check_engines([settings["engine1"], settings["engine2"]])
+    except (OSError, chess.engine.EngineError) as e:
+        print(f"Cannot start engine: {e}", file=sys.stderr)
+        return 1
+
+    pgn_file = open(args.pgn, 'a') if args.pgn else None
+    results_file = open(args.results, 'a') if args.results else None
+    archive = GameArchive(args.archive) if args.archive else None
+    score = {"wins": 0, "draws": 0, "losses": 0}
+    # Games of an opening pair (2k, 2k + 1) count once both are finished
+    sprt = SPRT(args.elo0, args.elo1, args.alpha, args.beta)
+    pair_points = {}
+
+    def on_result(record):
+        points = engine1_score(record)
+        if points == 1.0:
+            score["wins"] += 1
+        elif points == 0.5:
+            score["draws"] += 1
+        else:
+            score["losses"] += 1
+
+        # Stream every game out as soon as it finishes
+        if pgn_file:
+            pgn_file.write(record["pgn"] + "\n\n")
+            pgn_file.flush()
+        if archive is not None:
+            archive.append(
+                record["headers"],
+                [chess.Move.from_uci(uci) for uci in record["moves"]],
+                record["start_fen"]
+            )
+        if results_file:
+            line = {key: value for key, value in record.items() if key not in ("pgn", "moves", "headers")}
+            results_file.write(json.dumps(line) + "\n")
+            results_file.flush()
+
+        played = sum(score.values())
+        print(
+            f"Game {record['index'] + 1}: {record['white']} - {record['black']} "
+            f"{record['result']} ({record['termination']}, {record['plies']} plies)  "
+            f"Score {score['wins']}-{score['losses']}-{score['draws']} [{played}/{len(schedule)}]",
+            flush=True
+        )
+
+        pair = record["index"] // 2
+        pair_points.setdefault(pair, []).append(points)
+        if len(pair_points[pair]) == 2:
+            sprt.add_pair(sum(pair_points.pop(pair)))
+            if args.sprt:
+                print(f"SPRT({args.elo0:g}, {args.elo1:g}): {sprt.describe()}", flush=True)
+                return sprt.status() is not None
+        return False
+
+    try:
+        if args.spectate:
+            import spectator
+
+            # Results still arriving after the window is closed are dropped
+            def run(events, stopped):
+                run_match(settings, schedule, concurrency, lambda record: stopped.is_set() or on_result(record), events)
+
+            if not spectator.spectate(run, concurrency, args.fps):
+                raise KeyboardInterrupt
+        else:
+            run_match(settings, schedule, concurrency, on_result)
+    except KeyboardInterrupt:
+        print("Match interrupted", file=sys.stderr)
+        return 1
+    except (OSError, chess.engine.EngineError) as e:
+        # An engine that could not be restarted mid-match
+        print(f"Match aborted: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if pgn_file:
+            pgn_file.close()
+        if results_file:
+            results_file.close()
+        if archive is not None:
+            archive.close()
+
+    elo, low, high = sprt.elo()
+    print(f"Engine1 Elo {elo:+.1f} (95% {low:+.1f} .. {high:+.1f}) over {sprt.pairs} opening pairs")
+    if args.sprt:
+        status = sprt.status()
+        if status == "H1":
+            print(f"SPRT accepted H1, engine1 is about {args.elo1:g} Elo or more stronger: {sprt.describe()}")
+        elif status == "H0":
+            print(f"SPRT accepted H0, engine1 is about {args.elo0:g} Elo stronger at most: {sprt.describe()}")
+        else:
+            print(f"SPRT inconclusive after {sprt.pairs} pairs: {sprt.describe()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
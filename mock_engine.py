@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""Deterministic stand-in UCI engine for benchmarks
+
+    python mock_engine.py --delay 0.05 --info-lines 100
+
+Every search thinks for --delay seconds (or until "stop"), prints
+--info-lines info lines spread over that time and answers with a move picked
+from the position's Zobrist hash, so the same position always gets the same
+reply. "go infinite" and "go ponder" keep reporting until "stop"/"ponderhit".
+--hang-after N and --crash-after N make the N-th search of a process hang
+(ignoring "stop") or exit, for exercising the engine watchdog.
+"""
+import argparse
+import os
+import queue
+import sys
+import threading
+import time
+
+import chess
+import chess.polyglot
+
+
+class MockEngine:
+    def __init__(self, delay=0.0, info_lines=10, seed=0, name="Mock Engine", hang_after=0, crash_after=0):
+        self.delay = delay
+        self.info_lines = info_lines
+        self.seed = seed
+        self.name = name
+        self.hang_after = hang_after
+        self.crash_after = crash_after
+        self.searches = 0
+        self.board = chess.Board()
+        self.multipv = 1
+        self.commands = queue.Queue()
+
+    def send(self, line):
+        sys.stdout.write(line + "\n")
+        sys.stdout.flush()
+
+    def read_stdin(self):
+        for line in sys.stdin:
+            self.commands.put(line.strip())
+        self.commands.put("quit")
+
+    def run(self):
+        threading.Thread(target=self.read_stdin, daemon=True).start()
+        while True:
+            line = self.commands.get()
+            parts = line.split()
+            if not parts:
+                continue
+            command = parts[0]
+            if command == "uci":
+                self.send(f"id name {self.name}")
+                self.send("id author benchmark")
+                self.send("option name Hash type spin default 16 min 1 max 1024")
+                self.send("option name Threads type spin default 1 min 1 max 64")
+                self.send("option name MultiPV type spin default 1 min 1 max 10")
+                self.send("option name Skill Level type spin default 20 min 0 max 20")
+                self.send("option name Ponder type check default false")
+                self.send("uciok")
+            elif command == "isready":
+                self.send("readyok")
+            elif command == "setoption":
+                self.set_option(parts)
+            elif command == "ucinewgame":
+                self.board = chess.Board()
+            elif command == "position":
+                self.set_position(parts)
+            elif command == "go":
+                self.go(parts)
+            elif command == "quit":
+                return
+
+    def set_option(self, parts):
+        if "name" in parts and "value" in parts:
+            name = " ".join(parts[parts.index("name") + 1:parts.index("value")])
+            if name == "MultiPV":
+                self.multipv = max(1, int(parts[parts.index("value") + 1]))
+
+    def set_position(self, parts):
+        if parts[1] == "startpos":
+            self.board = chess.Board()
+            rest = parts[2:]
+        else:
+            end = parts.index("moves") if "moves" in parts else len(parts)
+            self.board = chess.Board(" ".join(parts[2:end]))
+            rest = parts[end:]
+        for uci in rest[1:]:
+            self.board.push_uci(uci)
+
+    def ranked_moves(self):
+        """Legal moves in a fixed order derived from the position"""
+        key = chess.polyglot.zobrist_hash(self.board) ^ self.seed
+        moves = sorted(self.board.legal_moves, key=lambda move: (move.from_square * 64 + move.to_square) ^ key)
+        return moves
+
+    def go(self, parts):
+        self.searches += 1
+        if self.searches == self.crash_after:
+            os._exit(3)
+        if self.searches == self.hang_after:
+            while True:
+                time.sleep(3600)
+
+        unlimited = "infinite" in parts or "ponder" in parts
+        moves = self.ranked_moves()
+        if not moves:
+            self.send("bestmove (none)")
+            return
+
+        # Info lines are spread evenly over the think time
+        interval = self.delay / self.info_lines if self.info_lines and self.delay else 0.0
+        started = time.monotonic()
+        sent = 0
+        while True:
+            elapsed = time.monotonic() - started
+            while sent < self.info_lines and sent * interval <= elapsed:
+                sent += 1
+                self.send_info(moves, sent, elapsed)
+            if unlimited and sent >= self.info_lines:
+                # Keep reporting every 10 ms (or every interval) until stopped
+                sent += 1
+                self.send_info(moves, sent, elapsed)
+            elif not unlimited and sent >= self.info_lines and elapsed >= self.delay:
+                break
+
+            if unlimited:
+                wait = interval or 0.01
+            elif sent < self.info_lines:
+                wait = sent * interval - elapsed
+            else:
+                wait = self.delay - elapsed
+            try:
+                command = self.commands.get(timeout=max(wait, 0.0005))
+            except queue.Empty:
+                continue
+
+            if command == "stop":
+                break
+            elif command == "ponderhit":
+                unlimited = False
+            elif command == "isready":
+                self.send("readyok")
+            elif command == "quit":
+                self.commands.put(command)
+                break
+
+        reply = self.board.copy()
+        reply.push(moves[0])
+        ponder = self.ranked_moves_for(reply)
+        self.send(f"bestmove {moves[0].uci()}" + (f" ponder {ponder.uci()}" if ponder else ""))
+
+    def send_info(self, moves, depth, elapsed):
+        for rank, move in enumerate(moves[:self.multipv], 1):
+            self.send(
+                f"info depth {depth} seldepth {depth + 4} multipv {rank} "
+                f"score cp {(self.board.ply() * 7 + rank * 13) % 80 - 40} nodes {depth * 5000} "
+                f"nps 5000000 hashfull {min(1000, depth)} time {int(elapsed * 1000)} pv {move.uci()}"
+            )
+
+    def ranked_moves_for(self, board):
+        saved, self.board = self.board, board
+        try:
+            moves = self.ranked_moves()
+        finally:
+            self.board = saved
+        return moves[0] if moves else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Deterministic mock UCI engine for benchmarks")
+    parser.add_argument("--delay", type=float, default=0.0, help="Think time per search in seconds")
+    parser.add_argument("--info-lines", type=int, default=10, help="Info lines sent per search")
+    parser.add_argument("--seed", type=int, default=0, help="Changes which moves are played")
+    parser.add_argument("--name", default="Mock Engine", help="Reported engine name")
+    parser.add_argument("--hang-after", type=int, default=0, help="Hang on this search (0 = never)")
+    parser.add_argument("--crash-after", type=int, default=0, help="Exit on this search (0 = never)")
+    args = parser.parse_args(argv)
+    MockEngine(args.delay, args.info_lines, args.seed, args.name, args.hang_after, args.crash_after).run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+import chess
+
+
+# Order of the promotion picker, most common choice first
+PROMOTION_PIECES = (chess.QUEEN, chess.KNIGHT, chess.ROOK, chess.BISHOP)
+
+
+class LegalMoveIndex:
+    """The legal moves of one position, grouped by from-square and target
+
+    Moves are generated once when the index is built. Looking up the
+    destinations of a piece or the moves between two squares is then a
+    dictionary access, however many moves the position has. A pawn reaching
+    the last rank maps to one move per promotion piece.
+    """
+
+    def __init__(self, board, key=None):
+        self.key = key
+        self.targets = {}
+        for move in board.generate_legal_moves():
+            self.targets.setdefault(move.from_square, {}).setdefault(move.to_square, []).append(move)
+
+    def can_move(self, square):
+        """True if the piece on square has at least one legal move"""
+        return square in self.targets
+
+    def destinations(self, square):
+        """Squares the piece on square can move to"""
+        return self.targets.get(square, {}).keys()
+
+    def moves(self, from_square, to_square):
+        """Legal moves from from_square to to_square (several for a promotion)"""
+        return self.targets.get(from_square, {}).get(to_square, [])
+
+    def is_promotion(self, from_square, to_square):
+        return len(self.moves(from_square, to_square)) > 1
+
+    def promotion(self, from_square, to_square, piece_type):
+        """The promotion move to piece_type, or None"""
+        for move in self.moves(from_square, to_square):
+            if move.promotion == piece_type:
+                return move
+        return None
@@ -0,0 +1,87 @@
+import chess
+import chess.pgn
+import chess.polyglot
+
+
+class MoveTree:
+    """A game with its variations, built on chess.pgn.GameNode
+
+    GameNode.board() replays every move from the start of the game. The tree
+    keeps a board snapshot every snapshot_interval plies instead, so the
+    position at any node costs one board copy and fewer than
+    snapshot_interval pushes. The Zobrist key of every node is kept as well,
+    so an OutcomeTracker can be reset without replaying the game.
+    """
+
+    def __init__(self, board=None, snapshot_interval=8):
+        self.snapshot_interval = max(1, snapshot_interval)
+        self.reset(board or chess.Board())
+
+    def reset(self, board):
+        """Start over from board's starting position with its moves as the mainline; returns the last node"""
+        replay = board.root()
+        self.game = chess.pgn.Game()
+        self.game.setup(replay)
+        self._plies = {self.game: 0}
+        self._keys = {self.game: chess.polyglot.zobrist_hash(replay)}
+        self._snapshots = {self.game: replay.copy()}
+
+        node = self.game
+        for move in board.move_stack:
+            replay.push(move)
+            node = self.add(node, move, replay)
+        return node
+
+    def add(self, node, move, board):
+        """The child of node that plays move, created as a new variation if needed
+
+        board is the position after move.
+        """
+        for child in node.variations:
+            if child.move == move:
+                return child
+
+        child = node.add_variation(move)
+        ply = self._plies[node] + 1
+        self._plies[child] = ply
+        self._keys[child] = chess.polyglot.zobrist_hash(board)
+        if ply % self.snapshot_interval == 0:
+            self._snapshots[child] = board.copy()
+        return child
+
+    def ply(self, node):
+        return self._plies[node]
+
+    def board(self, node):
+        """The position at node, with the full move stack"""
+        moves = []
+        while node not in self._snapshots:
+            moves.append(node.move)
+            node = node.parent
+        board = self._snapshots[node].copy()
+        for move in reversed(moves):
+            board.push(move)
+        return board
+
+    def keys(self, node):
+        """Zobrist keys of the positions from the start of the game to node"""
+        keys = []
+        while node is not None:
+            keys.append(self._keys[node])
+            node = node.parent
+        keys.reverse()
+        return keys
+
+    def line(self, node):
+        """Nodes from the first move to node, followed by node's main continuation"""
+        path = []
+        current = node
+        while current.parent is not None:
+            path.append(current)
+            current = current.parent
+        path.reverse()
+
+        while node.variations:
+            node = node.variations[0]
+            path.append(node)
+        return path
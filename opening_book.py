@@ -0,0 +1,130 @@
+import argparse
+import collections
+import struct
+import sys
+
+import chess
+import chess.polyglot
+
+import pgn_loader
+from game_archive import GameArchive
+
+
+ENTRY_STRUCT = struct.Struct(">QHHI")
+SELECTIONS = ("weighted", "random", "best")
+
+
+class OpeningBook:
+    """Polyglot .bin book probed before the engine is asked to search
+
+    The book file is memory-mapped once and kept open. pick() returns None
+    once the game is past max_depth plies or the position is not in the book.
+    """
+
+    def __init__(self, path, selection="weighted", max_depth=20):
+        if selection not in SELECTIONS:
+            raise ValueError(f"Book selection must be one of {', '.join(SELECTIONS)}")
+        self.path = path
+        self.selection = selection
+        self.max_depth = max_depth
+        self.reader = chess.polyglot.open_reader(path)
+
+    def pick(self, board, rng=None):
+        """Return a book move for board, or None"""
+        if self.max_depth and board.ply() >= self.max_depth:
+            return None
+
+        try:
+            if self.selection == "best":
+                entry = self.reader.find(board)
+            elif self.selection == "random":
+                entry = self.reader.choice(board, random=rng)
+            else:
+                entry = self.reader.weighted_choice(board, random=rng)
+        except IndexError:
+            return None
+        return entry.move
+
+    def close(self):
+        self.reader.close()
+
+
+def encode_polyglot_move(board, move):
+    """Raw Polyglot move: castling is written as the king capturing its rook"""
+    to_square = move.to_square
+    if board.is_castling(move):
+        rook_file = 7 if board.is_kingside_castling(move) else 0
+        to_square = chess.square(rook_file, chess.square_rank(move.from_square))
+    promotion = move.promotion - 1 if move.promotion else 0
+    return to_square | (move.from_square << 6) | (promotion << 12)
+
+
+def iter_source_games(path):
+    """Yield (start board, moves, result) from a .cga archive or a PGN file"""
+    if path.lower().endswith(".pgn"):
+        for headers, board, moves in pgn_loader.iter_games(path):
+            yield board, moves, headers.get("Result", "*")
+    else:
+        with GameArchive(path) as archive:
+            for game in archive:
+                board = chess.Board(game.start_fen) if game.start_fen else chess.Board()
+                yield board, game.moves, game.headers.get("Result", "*")
+
+
+def build_book(source_paths, output_path, max_ply=20, min_games=2):
+    """Write a Polyglot book from archived games; returns the number of entries
+
+    Every move played in the first max_ply plies scores 2 for a win, 1 for a
+    draw and 0 for a loss of the side that played it. Moves seen in fewer than
+    min_games games or with no score are left out.
+    """
+    scores = collections.defaultdict(int)
+    counts = collections.defaultdict(int)
+
+    for path in source_paths:
+        for board, moves, result in iter_source_games(path):
+            for move in moves[:max_ply]:
+                if result == "1/2-1/2":
+                    points = 1
+                elif result in ("1-0", "0-1"):
+                    points = 2 if (result == "1-0") == (board.turn == chess.WHITE) else 0
+                else:
+                    points = 0
+
+                key = (chess.polyglot.zobrist_hash(board), encode_polyglot_move(board, move))
+                scores[key] += points
+                counts[key] += 1
+                board.push(move)
+
+    entries = [(key, raw_move, score) for (key, raw_move), score in scores.items()
+               if score > 0 and counts[(key, raw_move)] >= min_games]
+
+    # Weights are 16 bit; scale down if the busiest move would overflow
+    top = max((score for _, _, score in entries), default=0)
+    scale = 0xffff / top if top > 0xffff else 1.0
+    entries.sort()
+
+    with open(output_path, 'wb') as f:
+        for key, raw_move, score in entries:
+            f.write(ENTRY_STRUCT.pack(key, raw_move, max(1, int(score * scale)), 0))
+    return len(entries)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="chessgui4.py book",
+        description="Build a Polyglot opening book from archived (.cga) or PGN games"
+    )
+    parser.add_argument("sources", nargs="+", help="Game archives (.cga) or PGN files")
+    parser.add_argument("--output", required=True, help="Polyglot .bin file to write")
+    parser.add_argument("--max-ply", type=int, default=20, help="Only use the first N plies of each game")
+    parser.add_argument("--min-games", type=int, default=2, help="Drop moves seen in fewer games")
+    args = parser.parse_args(argv)
+
+    count = build_book(args.sources, args.output, args.max_ply, args.min_games)
+    print(f"Wrote {count} book entries to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
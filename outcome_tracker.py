@@ -0,0 +1,124 @@
+import collections
+
+import chess
+import chess.polyglot
+
+
+class OutcomeTracker:
+    """Keeps game-over state up to date as moves are pushed and popped
+
+    Board.is_game_over() walks the whole move stack for the repetition checks
+    on every call. The tracker counts position keys as moves are made and
+    works out the outcome once per push/pop, so is_game_over(), outcome and
+    result() are constant time afterwards. Material and the halfmove clock come
+    straight from the board's bitboards, which python-chess already keeps
+    updated on push/pop.
+
+    With claim_draw=True threefold repetition and the fifty-move rule end the
+    game as well (as for engine matches).
+    """
+
+    def __init__(self, board, claim_draw=False):
+        self.claim_draw = claim_draw
+        self.reset(board)
+
+    def reset(self, board, keys=None):
+        """Start tracking board, replaying its existing move stack
+
+        keys, the Zobrist keys of every position from the start of the game
+        (e.g. from a MoveTree), saves the replay.
+        """
+        self.board = board
+        self.repetitions = collections.Counter()
+        self._keys = []
+        self.adjudication = None
+
+        if keys is not None:
+            self._keys = list(keys)
+            self.repetitions.update(self._keys)
+            self.outcome = self._compute()
+            return
+
+        replay = board.copy()
+        moves = list(replay.move_stack)
+        while replay.move_stack:
+            replay.pop()
+        self._count(replay)
+        for move in moves:
+            replay.push(move)
+            self._count(replay)
+
+        self.outcome = self._compute()
+
+    def _count(self, board):
+        key = chess.polyglot.zobrist_hash(board)
+        self.repetitions[key] += 1
+        self._keys.append(key)
+
+    def push(self, move):
+        """Push move on the tracked board and update the outcome"""
+        self.board.push(move)
+        self.adjudication = None
+        self._count(self.board)
+        self.outcome = self._compute()
+
+    def pop(self):
+        """Pop the last move from the tracked board"""
+        move = self.board.pop()
+        self.adjudication = None
+        key = self._keys.pop()
+        self.repetitions[key] -= 1
+        if not self.repetitions[key]:
+            del self.repetitions[key]
+        self.outcome = self._compute()
+        return move
+
+    @property
+    def key(self):
+        """Zobrist key of the current position"""
+        return self._keys[-1]
+
+    def repetition_count(self):
+        """How often the current position has occurred"""
+        return self.repetitions[self.key]
+
+    def _compute(self):
+        board = self.board
+        has_moves = any(board.generate_legal_moves())
+
+        if not has_moves and board.is_check():
+            return chess.Outcome(chess.Termination.CHECKMATE, not board.turn)
+        if board.is_insufficient_material():
+            return chess.Outcome(chess.Termination.INSUFFICIENT_MATERIAL, None)
+        if not has_moves:
+            return chess.Outcome(chess.Termination.STALEMATE, None)
+        if board.halfmove_clock >= 150:
+            return chess.Outcome(chess.Termination.SEVENTYFIVE_MOVES, None)
+
+        repetitions = self.repetition_count()
+        if repetitions >= 5:
+            return chess.Outcome(chess.Termination.FIVEFOLD_REPETITION, None)
+        if self.claim_draw:
+            if board.halfmove_clock >= 100:
+                return chess.Outcome(chess.Termination.FIFTY_MOVES, None)
+            if repetitions >= 3:
+                return chess.Outcome(chess.Termination.THREEFOLD_REPETITION, None)
+        return None
+
+    def adjudicate(self, result, reason):
+        """End the game for a reason the board cannot see, e.g. time forfeit"""
+        self.adjudication = (result, reason)
+
+    def is_game_over(self):
+        return self.outcome is not None or self.adjudication is not None
+
+    def result(self):
+        if self.adjudication:
+            return self.adjudication[0]
+        return self.outcome.result() if self.outcome else "*"
+
+    def reason(self):
+        """Why the game ended, e.g. "checkmate" or "time forfeit" """
+        if self.adjudication:
+            return self.adjudication[1]
+        return self.outcome.termination.name.replace("_", " ").lower() if self.outcome else None
@@ -0,0 +1,78 @@
+import chess
+import chess.pgn
+
+
+class _MainlineVisitor(chess.pgn.BaseVisitor):
+    """Collect headers and mainline moves only, skipping variations and comments"""
+
+    def begin_game(self):
+        self.headers = chess.pgn.Headers()
+        self.moves = []
+
+    def visit_header(self, tagname, tagvalue):
+        self.headers[tagname] = tagvalue
+
+    def begin_variation(self):
+        return chess.pgn.SKIP
+
+    def visit_move(self, board, move):
+        self.moves.append(move)
+
+    def result(self):
+        return self.headers, self.moves
+
+
+def open_pgn(path):
+    return open(path, 'r', encoding='utf-8-sig', errors='replace')
+
+
+def iter_pgn_index(path):
+    """Yield (offset, headers) for every game in a PGN file without parsing moves"""
+    with open_pgn(path) as f:
+        while True:
+            offset = f.tell()
+            headers = chess.pgn.read_headers(f)
+            if headers is None:
+                break
+            yield offset, headers
+
+
+def read_game_at(path, offset):
+    """Read the game starting at offset; returns (headers, start board, mainline moves)"""
+    with open_pgn(path) as f:
+        f.seek(offset)
+        parsed = chess.pgn.read_game(f, Visitor=_MainlineVisitor)
+    if parsed is None:
+        raise ValueError(f"No game at offset {offset}")
+    headers, moves = parsed
+    return headers, headers.board(), moves
+
+
+def iter_games(path):
+    """Lazily yield (headers, start board, mainline moves) for every game in a PGN file"""
+    with open_pgn(path) as f:
+        while True:
+            parsed = chess.pgn.read_game(f, Visitor=_MainlineVisitor)
+            if parsed is None:
+                break
+            headers, moves = parsed
+            yield headers, headers.board(), moves
+
+
+def iter_uci_moves(path):
+    """Yield the UCI strings of a saved game, one move per line"""
+    with open(path, 'r') as f:
+        for line in f:
+            move_uci = line.strip()
+            if move_uci:
+                yield move_uci
+
+
+def describe_game(number, headers):
+    """One line summary for the game picker"""
+    white = headers.get("White", "?")
+    black = headers.get("Black", "?")
+    result = headers.get("Result", "*")
+    date = headers.get("Date", "????.??.??")
+    event = headers.get("Event", "")
+    return f"{number}. {white} - {black}  {result}  {date}  {event}".rstrip()
@@ -0,0 +1,160 @@
+import collections
+import sqlite3
+import threading
+
+import chess
+import chess.engine
+import chess.polyglot
+
+
+CacheEntry = collections.namedtuple("CacheEntry", ["move", "score", "depth", "pv"])
+
+
+def _score_to_text(score):
+    """Serialize a side-to-move relative Score as "cp 35" / "mate -3" """
+    if score is None:
+        return None
+    if score.is_mate():
+        return f"mate {score.mate()}"
+    return f"cp {score.score()}"
+
+
+def _score_from_text(text):
+    if not text:
+        return None
+    kind, value = text.split()
+    return chess.engine.Mate(int(value)) if kind == "mate" else chess.engine.Cp(int(value))
+
+
+def _signed64(key):
+    # SQLite integers are signed 64 bit
+    return key - (1 << 64) if key >= (1 << 63) else key
+
+
+class PositionCache:
+    """Best move, score, depth and PV per (engine, position)
+
+    Positions are keyed by their Zobrist hash. A result only replaces an
+    existing one when it is at least as deep. The in-memory table is an LRU
+    bounded to max_entries; with a path, entries are also written to an
+    SQLite file so they survive across sessions and GUI instances.
+    """
+
+    def __init__(self, max_entries=100000, path=None, flush_every=64):
+        self.max_entries = max_entries
+        self.path = path
+        self.flush_every = flush_every
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._db = None
+
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS positions ("
+                "engine TEXT NOT NULL, key INTEGER NOT NULL, move TEXT NOT NULL, "
+                "score TEXT, depth INTEGER NOT NULL, pv TEXT, "
+                "PRIMARY KEY (engine, key))"
+            )
+            self._db.commit()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, board, engine_id):
+        """Return the CacheEntry for board, or None if unknown"""
+        key = (engine_id, chess.polyglot.zobrist_hash(board))
+        with self._lock:
+            row = self._entries.get(key)
+            if row is not None:
+                self._entries.move_to_end(key)
+            elif self._db:
+                row = self._load(key)
+                if row is not None:
+                    self._remember(key, row)
+
+        entry = self._decode(board, row) if row is not None else None
+        if entry:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return entry
+
+    def put(self, board, engine_id, move, info):
+        """Store an engine result for board; info is the engine's InfoDict"""
+        if move is None:
+            return
+
+        depth = info.get("depth", 0)
+        score = info.get("score")
+        row = (
+            move.uci(),
+            _score_to_text(score.relative) if score else None,
+            depth,
+            " ".join(m.uci() for m in info.get("pv", [])),
+        )
+
+        key = (engine_id, chess.polyglot.zobrist_hash(board))
+        with self._lock:
+            old = self._entries.get(key)
+            if old is None and self._db:
+                old = self._load(key)
+            if old is not None and old[2] > depth:
+                # Keep the deeper result
+                return
+
+            self._remember(key, row)
+            if self._db:
+                self._pending[key] = row
+                if len(self._pending) >= self.flush_every:
+                    self._flush()
+
+    def _remember(self, key, row):
+        self._entries[key] = row
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _load(self, key):
+        if key in self._pending:
+            return self._pending[key]
+        engine_id, zobrist = key
+        cursor = self._db.execute(
+            "SELECT move, score, depth, pv FROM positions WHERE engine = ? AND key = ?",
+            (engine_id, _signed64(zobrist))
+        )
+        return cursor.fetchone()
+
+    def _decode(self, board, row):
+        move_uci, score_text, depth, pv_text = row
+        move = chess.Move.from_uci(move_uci)
+        # Guard against the (rare) Zobrist collision
+        if not board.is_legal(move):
+            return None
+        pv = [chess.Move.from_uci(uci) for uci in pv_text.split()] if pv_text else [move]
+        return CacheEntry(move, _score_from_text(score_text), depth, pv)
+
+    def _flush(self):
+        if not self._pending:
+            return
+        self._db.executemany(
+            "INSERT OR REPLACE INTO positions (engine, key, move, score, depth, pv) VALUES (?, ?, ?, ?, ?, ?)",
+            [(engine_id, _signed64(zobrist)) + row for (engine_id, zobrist), row in self._pending.items()]
+        )
+        self._db.commit()
+        self._pending.clear()
+
+    def flush(self):
+        """Write pending entries to disk"""
+        if self._db:
+            with self._lock:
+                self._flush()
+
+    def close(self):
+        if self._db:
+            self.flush()
+            self._db.close()
+            self._db = None
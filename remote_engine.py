@@ -0,0 +1,484 @@
+import argparse
+import asyncio
+import socket
+import sys
+import time
+import urllib.parse
+
+import chess
+import chess.engine
+
+from resource_scheduler import ResourceScheduler, fit_options, pin_process
+
+
+DEFAULT_PORT = 9600
+# Round trips are smoothed so one slow packet does not cut a search short
+LATENCY_SMOOTHING = 0.25
+# Fields of "go" that the network round trip is taken off (milliseconds)
+TIMED_GO_FIELDS = ("movetime", "wtime", "btime")
+
+
+def is_remote(command):
+    """True for a tcp://host:port engine address"""
+    return isinstance(command, str) and command.startswith("tcp://")
+
+
+def parse_address(address):
+    """(host, port) of a tcp://host:port address"""
+    parts = urllib.parse.urlsplit(address)
+    if parts.scheme != "tcp" or not parts.hostname:
+        raise ValueError(f"Engine address must look like tcp://host:port: {address}")
+    return parts.hostname, parts.port or DEFAULT_PORT
+
+
+def compensate_go(line, latency_ms):
+    """A "go" command with latency_ms taken off its time fields (never below 1 ms)"""
+    tokens = line.split()
+    for i, token in enumerate(tokens[:-1]):
+        if token in TIMED_GO_FIELDS:
+            try:
+                tokens[i + 1] = str(max(1, int(tokens[i + 1]) - latency_ms))
+            except ValueError:
+                pass
+    return " ".join(tokens)
+
+
+def parse_option(line):
+    """chess.engine.Option from an engine's "option name ... type ..." line, or None
+
+    default, min and max are kept as the engine wrote them (default as text),
+    which is all the server needs to clamp values and restore defaults.
+    """
+    head, separator, rest = line.partition(" type ")
+    if not separator or not head.startswith("option name "):
+        return None
+
+    fields, key = {"type": []}, "type"
+    for token in rest.split():
+        if token in ("default", "min", "max", "var"):
+            key = token
+            fields.setdefault(key, [])
+        else:
+            fields[key].append(token)
+
+    def number(key):
+        try:
+            return int(fields[key][0])
+        except (KeyError, IndexError, ValueError):
+            return None
+
+    return chess.engine.Option(
+        head[len("option name "):].strip(),
+        " ".join(fields["type"]),
+        " ".join(fields["default"]) if "default" in fields else None,
+        number("min"),
+        number("max"),
+        fields.get("var", [])
+    )
+
+
+class TcpEngineTransport(asyncio.Protocol):
+    """The client end of a connection to an EngineServer
+
+    chess.engine protocols expect the SubprocessTransport of a local engine.
+    This class plays that part over a TCP socket: lines written to "stdin" go
+    to the server, and whatever the server sends arrives as the engine's
+    stdout. Closing or killing the transport hangs up, and the server then
+    stops (or, if it does not answer, kills) the engine behind the session.
+
+    The time from "isready" to "readyok" is the network round trip plus a
+    negligible engine delay. Its smoothed value is taken off movetime,
+    wtime and btime of every "go", so a remote engine answers within the
+    time it was given as seen from this side of the connection.
+    """
+
+    def __init__(self, address, engine_protocol):
+        self.address = address
+        self.engine_protocol = engine_protocol
+        self.socket_transport = None
+        self.returncode = None
+        self.latency = None
+        self._ping_sent = None
+        self._tail = b""
+
+    def connection_made(self, transport):
+        self.socket_transport = transport
+        sock = transport.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.engine_protocol.connection_made(self)
+
+    def data_received(self, data):
+        if self._ping_sent is not None and b"readyok" in self._tail + data:
+            rtt = time.monotonic() - self._ping_sent
+            self._ping_sent = None
+            if self.latency is None:
+                self.latency = rtt
+            else:
+                self.latency += LATENCY_SMOOTHING * (rtt - self.latency)
+        self._tail = data[-8:]
+        self.engine_protocol.pipe_data_received(1, data)
+
+    def connection_lost(self, exc):
+        self.returncode = 0 if exc is None else 1
+        self.engine_protocol.connection_lost(exc)
+
+    def get_pipe_transport(self, fd):
+        # Only stdin is ever asked for
+        return self
+
+    def write(self, data):
+        line = data.decode("utf-8").rstrip("\n")
+        if line == "isready":
+            self._ping_sent = time.monotonic()
+        elif line.startswith("go ") and self.latency:
+            line = compensate_go(line, int(self.latency * 1000))
+        self.socket_transport.write((line + "\n").encode("utf-8"))
+
+    def get_pid(self):
+        """None: there is no local process (and nothing to pin)"""
+        return None
+
+    def get_returncode(self):
+        return self.returncode
+
+    def kill(self):
+        if self.socket_transport:
+            self.socket_transport.abort()
+
+    def close(self):
+        if self.socket_transport:
+            self.socket_transport.close()
+
+
+async def connect_uci(address, timeout=10.0):
+    """Connect to an EngineServer; returns a (transport, UciProtocol) pair like popen_uci"""
+    host, port = parse_address(address)
+    protocol = chess.engine.UciProtocol()
+    transport = TcpEngineTransport(address, protocol)
+    try:
+        await asyncio.wait_for(asyncio.get_running_loop().create_connection(lambda: transport, host, port), timeout)
+    except (OSError, asyncio.TimeoutError) as e:
+        raise chess.engine.EngineError(f"Cannot reach engine server {address}: {e}") from e
+
+    try:
+        await asyncio.wait_for(protocol.initialize(), timeout)
+        # A first round trip, so the first search is already compensated
+        await protocol.ping()
+    except chess.engine.EngineTerminatedError as e:
+        raise chess.engine.EngineError(f"Engine server {address} hung up (busy, or its engine failed to start)") from e
+    except BaseException:
+        transport.close()
+        raise
+    return transport, protocol
+
+
+async def open_uci(command):
+    """popen_uci for a local command, connect_uci for a tcp:// address"""
+    if is_remote(command):
+        return await connect_uci(command)
+    return await chess.engine.popen_uci(command)
+
+
+def open_simple_engine(command, timeout=10.0):
+    """chess.engine.SimpleEngine for a local command or a tcp:// address"""
+    if not is_remote(command):
+        return chess.engine.SimpleEngine.popen_uci(command, timeout=timeout)
+
+    # Same as SimpleEngine.popen, with a connection instead of a process
+    async def background(future):
+        transport, protocol = await connect_uci(command, timeout)
+        simple_engine = chess.engine.SimpleEngine(transport, protocol, timeout=timeout)
+        try:
+            future.set_result(simple_engine)
+            returncode = await protocol.returncode
+            simple_engine.returncode.set_result(returncode)
+        finally:
+            simple_engine.close()
+        await simple_engine.shutdown_event.wait()
+
+    return chess.engine.run_in_background(background, name=f"SimpleEngine ({command})")
+
+
+class ServedEngine:
+    """One engine process kept by an EngineServer, with the options it declares"""
+
+    def __init__(self, process, slot):
+        self.process = process
+        self.slot = slot
+        self.options = {}
+
+    @property
+    def alive(self):
+        return self.process.returncode is None
+
+    def send(self, line):
+        self.process.stdin.write((line + "\n").encode("utf-8"))
+
+    async def read_until(self, reply, timeout):
+        """Read (and drop) engine output up to the line reply; False on timeout or exit"""
+        async def read():
+            while True:
+                line = await self.process.stdout.readline()
+                if not line:
+                    return False
+                text = line.decode("utf-8", "replace").strip()
+                if text.startswith("option name "):
+                    option = parse_option(text)
+                    if option:
+                        self.options[option.name] = option
+                if text == reply:
+                    return True
+
+        try:
+            return await asyncio.wait_for(read(), timeout)
+        except asyncio.TimeoutError:
+            return False
+
+    def kill(self):
+        if self.alive:
+            try:
+                self.process.kill()
+            except ProcessLookupError:
+                pass
+
+
+class EngineServer:
+    """Serves a local UCI engine over TCP, one engine process per session
+
+    Every connection is a session that talks plain UCI to an engine process
+    of its own, so up to max_sessions clients (GUIs, match or analysis
+    workers) can search at once. Further connections are turned away; a
+    session that arrives while an ended one is still releasing its engine
+    waits for it.
+
+    Processes outlive their sessions: when a client hangs up or sends
+    "quit", the engine is stopped, the options the client changed are set
+    back to their defaults, and the process waits for the next connection.
+    An engine that does not answer isready within release_timeout (hung,
+    or still searching) is killed instead.
+
+    options are set on every engine and cannot be changed by clients. With
+    a scheduler, each session slot also gets its share of this machine's
+    Threads/Hash (and CPU set), since only the server knows its cores.
+    """
+
+    def __init__(self, engine_command, host="127.0.0.1", port=DEFAULT_PORT, max_sessions=4,
+                 options=None, scheduler=None, release_timeout=2.0):
+        self.engine_command = engine_command if isinstance(engine_command, list) else [engine_command]
+        self.host = host
+        self.port = port
+        self.max_sessions = max_sessions
+        self.options = dict(options or {})
+        self.plan = scheduler.plan(max_sessions) if scheduler else None
+        self.release_timeout = release_timeout
+        self.sessions = 0
+        self.idle = []
+        self.engines = set()  # every process started, idle or in a session
+        self._free_slots = list(range(max_sessions))
+        self._engines_returned = asyncio.Condition()
+        self._server = None
+
+    def owned(self, slot):
+        """Options the server sets for the engine in slot, clients' values notwithstanding"""
+        options = dict(self.plan[slot]["options"]) if self.plan else {}
+        options.update(self.options)
+        return options
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._session, self.host, self.port)
+        # Port 0 picks a free port
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        await self._server.serve_forever()
+
+    async def close(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        # Including engines of sessions still open: a hung one would outlive the server
+        for engine in self.engines:
+            engine.kill()
+        self.engines.clear()
+        self.idle = []
+
+    async def _session(self, reader, writer):
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if self.sessions >= self.max_sessions:
+            writer.write(f"info string server busy ({self.max_sessions} sessions)\n".encode("utf-8"))
+            writer.close()
+            return
+
+        self.sessions += 1
+        engine = None
+        changed = set()
+        try:
+            engine = await self._acquire()
+            if engine:
+                await self._relay(reader, writer, engine, changed)
+        except (ConnectionError, OSError):
+            pass
+        except asyncio.CancelledError:
+            # The server is shutting down and has killed the engines already
+            pass
+        finally:
+            self.sessions -= 1
+            writer.close()
+            if engine:
+                await self._release(engine, changed)
+
+    async def _acquire(self):
+        """A warm idle engine, or a new process; None if the engine cannot be started"""
+        async with self._engines_returned:
+            while True:
+                while self.idle:
+                    engine = self.idle.pop()
+                    if engine.alive:
+                        return engine
+                    self.engines.discard(engine)
+                    self._free_slots.append(engine.slot)
+                if self._free_slots:
+                    slot = self._free_slots.pop(0)
+                    break
+                # Sessions that just ended keep their engines until they are released
+                await self._engines_returned.wait()
+
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *self.engine_command,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL
+            )
+        except OSError as e:
+            print(f"Cannot start {self.engine_command[0]}: {e}", file=sys.stderr, flush=True)
+            await self._put_back(slot=slot)
+            return None
+
+        engine = ServedEngine(process, slot)
+        self.engines.add(engine)
+        if self.plan and self.plan[slot]["cpus"]:
+            pin_process(process.pid, self.plan[slot]["cpus"])
+        engine.send("uci")
+        if await engine.read_until("uciok", self.release_timeout * 5):
+            for name, value in fit_options(self.owned(slot), engine.options).items():
+                engine.send(f"setoption name {name} value {value}")
+            engine.send("isready")
+            if await engine.read_until("readyok", self.release_timeout * 5):
+                return engine
+
+        await self._retire(engine)
+        return None
+
+    async def _relay(self, reader, writer, engine, changed):
+        """Pass lines both ways until the client hangs up or quits, or the engine exits"""
+        owned = {name.lower() for name in self.owned(engine.slot)}
+
+        async def from_client():
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                text = line.decode("utf-8", "replace").strip()
+                if text == "quit":
+                    return
+                if text.startswith("setoption name "):
+                    name = text[len("setoption name "):].partition(" value")[0].strip()
+                    if name.lower() in owned:
+                        continue
+                    changed.add(name)
+                engine.process.stdin.write(line)
+                await engine.process.stdin.drain()
+
+        async def from_engine():
+            while True:
+                line = await engine.process.stdout.readline()
+                if not line:
+                    return
+                writer.write(line)
+                await writer.drain()
+
+        tasks = [asyncio.ensure_future(from_client()), asyncio.ensure_future(from_engine())]
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _release(self, engine, changed):
+        """Reset the engine for the next session, or kill it if it does not answer"""
+        if engine.alive:
+            try:
+                engine.send("stop")
+                for name in changed:
+                    option = engine.options.get(name)
+                    if option is not None and option.default is not None:
+                        engine.send(f"setoption name {name} value {option.default}")
+                engine.send("ucinewgame")
+                engine.send("isready")
+                if await engine.read_until("readyok", self.release_timeout):
+                    await self._put_back(engine=engine)
+                    return
+            except (ConnectionError, OSError):
+                pass
+        await self._retire(engine)
+
+    async def _retire(self, engine):
+        """Kill engine and free its slot"""
+        engine.kill()
+        self.engines.discard(engine)
+        await self._put_back(slot=engine.slot)
+
+    async def _put_back(self, engine=None, slot=None):
+        """Return an engine to the idle list, or a free slot"""
+        async with self._engines_returned:
+            if engine:
+                self.idle.append(engine)
+            else:
+                self._free_slots.append(slot)
+            self._engines_returned.notify()
+
+
+def main(argv=None):
+    from match_runner import parse_engine_options
+
+    parser = argparse.ArgumentParser(description="Serve a local UCI engine to remote GUIs and match/analysis workers")
+    parser.add_argument("--engine", required=True, help="Path to the UCI engine")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (0.0.0.0 for every interface)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="TCP port")
+    parser.add_argument("--sessions", type=int, default=4, help="Engine processes (concurrent clients)")
+    parser.add_argument("--option", action="append", metavar="NAME=VALUE", help="UCI option for every engine (clients cannot change it)")
+    parser.add_argument("--auto-resources", action="store_true", help="Give every session its share of this machine's Threads/Hash")
+    parser.add_argument("--pin", action="store_true", help="With --auto-resources, also pin every engine to its cores")
+    args = parser.parse_args(argv)
+
+    try:
+        options = parse_engine_options(args.option)
+    except ValueError as e:
+        parser.error(str(e))
+    scheduler = ResourceScheduler(reserve_cpus=0, pin=args.pin) if args.auto_resources else None
+
+    async def serve():
+        server = await EngineServer(args.engine, args.host, args.port, args.sessions, options, scheduler).start()
+        print(f"Serving {args.engine} on tcp://{args.host}:{server.port} ({args.sessions} sessions)", flush=True)
+        if scheduler:
+            print(f"Resources per session: {scheduler.describe(args.sessions)}", flush=True)
+        try:
+            await server.serve_forever()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        print("Server stopped", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+import os
+
+
+def usable_cpus():
+    """CPUs this process may run on (respects taskset/cgroup affinity where supported)"""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def available_memory_mb():
+    """Memory available for new allocations in MB, or None if it cannot be told"""
+    try:
+        with open("/proc/meminfo", 'r') as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_AVPHYS_PAGES") // (1024 * 1024)
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def pin_process(pid, cpus):
+    """Restrict every thread of process pid to cpus; False where affinity is unsupported
+
+    sched_setaffinity on a pid only moves that one thread, so the engine's
+    existing search threads are pinned one by one (new ones inherit it).
+    """
+    if not hasattr(os, "sched_setaffinity"):
+        return False
+    try:
+        threads = [int(tid) for tid in os.listdir(f"/proc/{pid}/task")]
+    except OSError:
+        threads = [pid]
+    try:
+        for tid in threads:
+            os.sched_setaffinity(tid, cpus)
+    except (ProcessLookupError, PermissionError, OSError):
+        return False
+    return True
+
+
+def fit_options(options, engine_options):
+    """The options an engine declares, with spin values clamped to its range
+
+    A scheduled Threads or Hash may be more than a given engine supports,
+    and engines without such an option would reject it outright.
+    """
+    fitted = {}
+    for name, value in options.items():
+        option = engine_options.get(name)
+        if option is None:
+            continue
+        if option.type == "spin" and option.min is not None and option.max is not None:
+            value = max(option.min, min(option.max, int(value)))
+        fitted[name] = value
+    return fitted
+
+
+class ResourceScheduler:
+    """Shares the machine's cores and memory between engine processes
+
+    Engines are grouped into slots: engines in one slot never search at the
+    same time (e.g. two battle engines taking turns), so they may all use the
+    slot's cores. Engines in different slots do search at once (pondering,
+    live analysis, game review) and get disjoint cores, so the sum of their
+    Threads never exceeds the machine. reserve_cpus cores are kept for the
+    GUI when there are enough to go round. Hash is split between all engine
+    processes, because each one keeps its table whether it searches or not.
+    Available memory is read again for every plan unless memory_mb is given;
+    hash_fraction=0 leaves every engine at its default Hash.
+
+    With pin=True every engine process is also bound to its slot's CPU set.
+    """
+
+    def __init__(self, cpus=None, memory_mb=None, reserve_cpus=1, hash_fraction=0.5,
+                 min_hash_mb=16, max_hash_mb=4096, pin=False):
+        self.cpus = list(cpus) if cpus is not None else usable_cpus()
+        self._memory_mb = memory_mb
+        self.reserve_cpus = reserve_cpus
+        self.hash_fraction = hash_fraction
+        self.min_hash_mb = min_hash_mb
+        self.max_hash_mb = max_hash_mb
+        self.pin = pin
+
+    @property
+    def memory_mb(self):
+        return self._memory_mb if self._memory_mb is not None else available_memory_mb()
+
+    def cpu_sets(self, slots):
+        """Split the usable CPUs into slots disjoint sets (overlapping only if there are too few)"""
+        cpus = self.cpus
+        if len(cpus) - self.reserve_cpus >= slots:
+            cpus = cpus[self.reserve_cpus:]
+        if len(cpus) < slots:
+            return [{cpus[i % len(cpus)]} for i in range(slots)]
+
+        size, extra = divmod(len(cpus), slots)
+        sets, start = [], 0
+        for i in range(slots):
+            end = start + size + (i < extra)
+            sets.append(set(cpus[start:end]))
+            start = end
+        return sets
+
+    def hash_mb(self, processes):
+        """Hash size per engine: a power of two within [min_hash_mb, max_hash_mb], or None"""
+        if not self.hash_fraction or processes < 1:
+            return None
+        memory_mb = self.memory_mb
+        if not memory_mb:
+            return None
+        share = int(memory_mb * self.hash_fraction / processes)
+        size = self.min_hash_mb
+        while size * 2 <= min(share, self.max_hash_mb):
+            size *= 2
+        return size
+
+    def plan(self, slots, processes=None):
+        """One assignment per slot: {"options": {"Threads", "Hash"}, "cpus": set or None}
+
+        processes is the number of engine processes sharing the memory
+        (defaults to one per slot).
+        """
+        if slots < 1:
+            return []
+        hash_mb = self.hash_mb(processes or slots)
+        plan = []
+        for cpus in self.cpu_sets(slots):
+            options = {"Threads": len(cpus)}
+            if hash_mb:
+                options["Hash"] = hash_mb
+            plan.append({"options": options, "cpus": cpus if self.pin else None})
+        return plan
+
+    def describe(self, slots, processes=None):
+        """Human readable plan, e.g. "Threads 4, Hash 1024 MB; Threads 3, Hash 1024 MB" """
+        parts = []
+        for assignment in self.plan(slots, processes):
+            options = assignment["options"]
+            text = f"Threads {options['Threads']}"
+            if "Hash" in options:
+                text += f", Hash {options['Hash']} MB"
+            if assignment["cpus"]:
+                text += f", CPUs {','.join(str(cpu) for cpu in sorted(assignment['cpus']))}"
+            parts.append(text)
+        return "; ".join(parts)
@@ -0,0 +1,377 @@
+import math
+import multiprocessing
+import queue
+import threading
+import time
+import tkinter as tk
+import tkinter.font as tkfont
+
+import chess
+
+from chess_clock import format_clock
+from game_review import EVAL_CAP
+
+
+class SpectatedGame:
+    """What one spectator tile knows about the game it shows"""
+
+    def __init__(self):
+        self.index = None
+        self.board = None
+        self.white = ""
+        self.black = ""
+        self.score = None  # White's centipawns after the last engine move
+        self.clocks = None  # (white, black) seconds left when clocks_at was taken
+        self.clocks_at = 0.0
+        self.result = None
+        self.finished_at = 0.0
+        self.dirty = True
+
+    @property
+    def live(self):
+        return self.board is not None and self.result is None
+
+    def time_left(self, color, now):
+        """color's clock, counting down while it is color's move"""
+        seconds = self.clocks[0 if color == chess.WHITE else 1]
+        if self.live and self.board.turn == color:
+            seconds -= now - self.clocks_at
+        return seconds
+
+
+class SpectatorView:
+    """Tiles live games on one canvas, redrawn by a single frame-capped loop
+
+    Game workers put events on a queue (a multiprocessing.Queue for a match
+    pool). The view never reacts to an event directly: once per frame it
+    drains whatever has arrived, applies it to the tiles and redraws only
+    the tiles that changed, and of those only the squares and labels that
+    differ. However many games and moves there are, the canvas is touched at
+    most max_fps times a second.
+
+    Events are tuples:
+        ("start", index, white, black, fen)
+        ("move", index, uci, white_cp, clocks)  clocks: (white, black) seconds or None
+        ("end", index, result, termination)
+        ("finished",)  no more games will come
+    """
+
+    def __init__(self, root, events, tiles, columns=None, max_fps=10, on_close=None):
+        self.root = root
+        self.events = events
+        self.games = [SpectatedGame() for _ in range(max(1, tiles))]
+        self.columns = columns or math.ceil(math.sqrt(len(self.games)))
+        self.rows = math.ceil(len(self.games) / self.columns)
+        self.on_close = on_close
+        self.slots = {}  # game index -> tile
+        self.finished = False
+        self.games_finished = 0
+
+        # Rendering
+        self.frame_interval = max(1, 1000 // max_fps)  # ms between frames
+        self.max_events_per_frame = 5000  # the rest waits for the next frame, so a burst cannot stall Tk
+        self.square_size = 32
+        self.min_square_size = 12
+        self.padding = 6
+        self.strip_height = 16  # name/clock lines above and below each board
+        self.bar_height = 5  # evaluation bar under each board
+        self.resize_delay = 150
+        self.resize_after_id = None
+        self.frame_after_id = None
+        self.fonts = {}
+        self.light_square_color = "#f0d9b5"
+        self.dark_square_color = "#b58863"
+        self.last_move_color = "#90ee90"
+        self.text_color = '#ecf0f1'
+        self.idle_text_color = '#7f8c8d'
+
+        self.root.title("Spectator")
+        self.root.configure(bg='#2c3e50')
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+        tile_width, tile_height = self.tile_size(self.square_size)
+        self.canvas = tk.Canvas(
+            root,
+            width=tile_width * self.columns,
+            height=tile_height * self.rows,
+            bg='#2c3e50',
+            highlightthickness=0
+        )
+        self.canvas.pack(fill=tk.BOTH, expand=True)
+        self.canvas.bind("<Configure>", self.on_canvas_configure)
+        self.create_tiles()
+        self.frame_after_id = self.root.after(self.frame_interval, self.render_frame)
+
+    def font(self, size, weight="normal"):
+        key = (size, weight)
+        if key not in self.fonts:
+            self.fonts[key] = tkfont.Font(root=self.root, family="Arial", size=size, weight=weight)
+        return self.fonts[key]
+
+    def tile_size(self, square_size):
+        return (
+            8 * square_size + 2 * self.padding,
+            8 * square_size + 2 * self.strip_height + self.bar_height + 2 * self.padding
+        )
+
+    def on_canvas_configure(self, event):
+        if self.resize_after_id:
+            self.root.after_cancel(self.resize_after_id)
+        self.resize_after_id = self.root.after(self.resize_delay, self.resize_tiles, event.width, event.height)
+
+    def resize_tiles(self, width, height):
+        """Fit the grid of tiles into width x height pixels"""
+        self.resize_after_id = None
+        spare_width = width // self.columns - 2 * self.padding
+        spare_height = height // self.rows - 2 * self.strip_height - self.bar_height - 2 * self.padding
+        square_size = max(self.min_square_size, min(spare_width, spare_height) // 8)
+        if square_size == self.square_size:
+            return
+
+        self.square_size = square_size
+        self.create_tiles()
+
+    def create_tiles(self):
+        """Create every tile's canvas items once; frames only update them"""
+        self.canvas.delete("all")
+        self.tiles = []
+        sq = self.square_size
+        tile_width, tile_height = self.tile_size(sq)
+        piece_font = self.font(max(6, sq * 8 // 15), "bold")
+        label_font = self.font(8)
+
+        for slot in range(len(self.games)):
+            left = (slot % self.columns) * tile_width + self.padding
+            top = (slot // self.columns) * tile_height + self.padding
+            board_top = top + self.strip_height
+            board_bottom = board_top + 8 * sq
+            right = left + 8 * sq
+
+            tile = {"origin": (left, board_top), "pieces": {}, "drawn_pieces": {}, "drawn_text": {}, "drawn_last_move": None}
+            for square in chess.SQUARES:
+                x1 = left + chess.square_file(square) * sq
+                y1 = board_top + (7 - chess.square_rank(square)) * sq
+                light = (chess.square_file(square) + chess.square_rank(square)) % 2 == 1
+                self.canvas.create_rectangle(
+                    x1, y1, x1 + sq, y1 + sq,
+                    fill=self.light_square_color if light else self.dark_square_color,
+                    width=0
+                )
+            tile["last_move"] = [
+                self.canvas.create_rectangle(0, 0, 0, 0, outline=self.last_move_color, width=2, state=tk.HIDDEN)
+                for _ in range(2)
+            ]
+            for square in chess.SQUARES:
+                tile["pieces"][square] = self.canvas.create_text(
+                    left + chess.square_file(square) * sq + sq // 2,
+                    board_top + (7 - chess.square_rank(square)) * sq + sq // 2,
+                    text="",
+                    font=piece_font,
+                    state=tk.HIDDEN
+                )
+                tile["drawn_pieces"][square] = None
+
+            # Black plays from the top, White from the bottom
+            top_line = top + self.strip_height // 2
+            bottom_line = board_bottom + self.strip_height // 2
+            tile["labels"] = {
+                "black": self.canvas.create_text(left, top_line, anchor=tk.W, font=label_font, fill=self.text_color),
+                "black_clock": self.canvas.create_text(right, top_line, anchor=tk.E, font=label_font, fill=self.text_color),
+                "status": self.canvas.create_text((left + right) // 2, top_line, font=label_font, fill=self.idle_text_color),
+                "white": self.canvas.create_text(left, bottom_line, anchor=tk.W, font=label_font, fill=self.text_color),
+                "white_clock": self.canvas.create_text(right, bottom_line, anchor=tk.E, font=label_font, fill=self.text_color),
+                "eval": self.canvas.create_text((left + right) // 2, bottom_line, font=label_font, fill=self.idle_text_color),
+            }
+            bar_top = board_bottom + self.strip_height
+            self.canvas.create_rectangle(left, bar_top, right, bar_top + self.bar_height, fill='#1a1a1a', width=0)
+            tile["bar"] = self.canvas.create_rectangle(left, bar_top, (left + right) // 2, bar_top + self.bar_height, fill=self.text_color, width=0)
+            tile["bar_span"] = (left, right, bar_top)
+            tile["drawn_bar"] = None
+            self.tiles.append(tile)
+
+        for game in self.games:
+            game.dirty = True
+
+    def render_frame(self):
+        """One frame: apply the queued events, then redraw what they changed"""
+        self.drain_events()
+        now = time.monotonic()
+        for slot, game in enumerate(self.games):
+            if game.dirty:
+                self.draw_tile(slot, game)
+                game.dirty = False
+            elif game.clocks and game.live:
+                # Only the mover's clock runs; its label changes at most once per 0.1-1 s
+                self.draw_clocks(slot, game, now)
+        self.frame_after_id = self.root.after(self.frame_interval, self.render_frame)
+
+    def drain_events(self):
+        for _ in range(self.max_events_per_frame):
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                return
+            self.apply(event)
+
+    def apply(self, event):
+        kind = event[0]
+        if kind == "finished":
+            self.finished = True
+            self.update_title()
+            return
+
+        if kind == "start":
+            _, index, white, black, fen = event
+            slot = self.free_slot()
+            self.slots = {i: s for i, s in self.slots.items() if s != slot}
+            self.slots[index] = slot
+            game = self.games[slot] = SpectatedGame()
+            game.index = index
+            game.white, game.black = white, black
+            game.board = chess.Board(fen)
+            self.update_title()
+            return
+
+        slot = self.slots.get(event[1])
+        if slot is None:
+            # A game that started before the view (or had no free tile)
+            return
+        game = self.games[slot]
+        if kind == "move":
+            _, _, uci, score, clocks = event
+            game.board.push(chess.Move.from_uci(uci))
+            if score is not None:
+                game.score = score
+            if clocks:
+                game.clocks = clocks
+                game.clocks_at = time.monotonic()
+        elif kind == "end":
+            _, _, result, termination = event
+            game.result = f"{result} {termination}"
+            game.finished_at = time.monotonic()
+            self.games_finished += 1
+            self.update_title()
+        game.dirty = True
+
+    def free_slot(self):
+        """A tile without a live game, preferring the one whose game ended longest ago"""
+        idle = [slot for slot, game in enumerate(self.games) if not game.live]
+        if not idle:
+            # More live games than tiles: reuse the oldest
+            return min(range(len(self.games)), key=lambda slot: self.games[slot].index)
+        return min(idle, key=lambda slot: self.games[slot].finished_at)
+
+    def update_title(self):
+        live = sum(game.live for game in self.games)
+        state = "match finished" if self.finished else f"{live} live"
+        self.root.title(f"Spectator - {state}, {self.games_finished} games finished")
+
+    def set_label(self, tile, name, text, fill=None):
+        if tile["drawn_text"].get(name) == (text, fill):
+            return
+        options = {"text": text}
+        if fill:
+            options["fill"] = fill
+        self.canvas.itemconfig(tile["labels"][name], **options)
+        tile["drawn_text"][name] = (text, fill)
+
+    def draw_tile(self, slot, game):
+        tile = self.tiles[slot]
+        board = game.board
+
+        piece_map = board.piece_map() if board else {}
+        for square, drawn in tile["drawn_pieces"].items():
+            piece = piece_map.get(square)
+            if piece == drawn:
+                continue
+            item = tile["pieces"][square]
+            if piece:
+                fill = '#1a1a1a' if piece.color == chess.WHITE else '#8b0000'
+                self.canvas.itemconfig(item, text=piece.unicode_symbol(), fill=fill, state=tk.NORMAL)
+            else:
+                self.canvas.itemconfig(item, state=tk.HIDDEN)
+            tile["drawn_pieces"][square] = piece
+
+        last_move = board.peek() if board and board.move_stack else None
+        if last_move != tile["drawn_last_move"]:
+            left, top = tile["origin"]
+            sq = self.square_size
+            for item, square in zip(tile["last_move"], (last_move.from_square, last_move.to_square) if last_move else ()):
+                x1 = left + chess.square_file(square) * sq
+                y1 = top + (7 - chess.square_rank(square)) * sq
+                self.canvas.coords(item, x1 + 1, y1 + 1, x1 + sq - 1, y1 + sq - 1)
+                self.canvas.itemconfig(item, state=tk.NORMAL)
+            if not last_move:
+                for item in tile["last_move"]:
+                    self.canvas.itemconfig(item, state=tk.HIDDEN)
+            tile["drawn_last_move"] = last_move
+
+        # Names are cut to what fits beside the status and clock
+        width = max(4, self.square_size * 3 // 8)
+        self.set_label(tile, "white", game.white[:width])
+        self.set_label(tile, "black", game.black[:width])
+        if board is None:
+            status = "waiting"
+        elif game.result:
+            status = game.result
+        else:
+            status = f"#{game.index + 1}  move {board.fullmove_number}"
+        self.set_label(tile, "status", status, self.idle_text_color if game.result else self.text_color)
+        self.set_label(tile, "eval", "" if game.score is None else f"{game.score / 100:+.1f}")
+        if game.clocks:
+            self.draw_clocks(slot, game, time.monotonic())
+        else:
+            self.set_label(tile, "white_clock", "")
+            self.set_label(tile, "black_clock", "")
+
+        # Evaluation bar: White's share grows with White's (capped) advantage
+        cp = max(-EVAL_CAP, min(EVAL_CAP, game.score or 0))
+        share = 0.5 + cp / (2 * EVAL_CAP)
+        if share != tile["drawn_bar"]:
+            left, right, bar_top = tile["bar_span"]
+            self.canvas.coords(tile["bar"], left, bar_top, left + (right - left) * share, bar_top + self.bar_height)
+            tile["drawn_bar"] = share
+
+    def draw_clocks(self, slot, game, now):
+        tile = self.tiles[slot]
+        for color, name in ((chess.WHITE, "white_clock"), (chess.BLACK, "black_clock")):
+            running = game.live and game.board.turn == color
+            self.set_label(tile, name, format_clock(game.time_left(color, now)), self.text_color if running else self.idle_text_color)
+
+    def close(self):
+        if self.frame_after_id:
+            self.root.after_cancel(self.frame_after_id)
+            self.frame_after_id = None
+        if self.on_close:
+            self.on_close()
+        self.root.destroy()
+
+
+def spectate(run, tiles, max_fps=10):
+    """Play games with run(events, stopped) on a background thread and watch them live
+
+    run puts SpectatorView events on events (a multiprocessing.Queue, so
+    worker processes can feed it) and should give up once stopped is set.
+    Blocks until the window is closed; returns True if run had finished by
+    then. An exception raised by run is re-raised here.
+    """
+    root = tk.Tk()
+    events = multiprocessing.Queue()
+    stopped = threading.Event()
+    failure = []
+    SpectatorView(root, events, tiles, max_fps=max_fps, on_close=stopped.set)
+
+    def background():
+        try:
+            run(events, stopped)
+        except Exception as e:
+            failure.append(e)
+        finally:
+            events.put(("finished",))
+
+    # A daemon, so closing the window mid-match does not wait for the games
+    thread = threading.Thread(target=background, name="spectated match", daemon=True)
+    thread.start()
+    root.mainloop()
+    if failure:
+        raise failure[0]
+    return not thread.is_alive()
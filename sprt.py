@@ -0,0 +1,123 @@
+import math
+
+
+# Score of one game pair (both colours of an opening) as a fraction of 2 points
+PAIR_SCORES = (0.0, 0.25, 0.5, 0.75, 1.0)
+
+
+def logistic_score(elo):
+    """Expected score for an Elo difference"""
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+def logistic_elo(score):
+    """Elo difference for an expected score"""
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return -400 * math.log10(1 / score - 1)
+
+
+def _regularize(counts):
+    # Empty cells would make the likelihood degenerate early in a run
+    return [count if count else 1e-3 for count in counts]
+
+
+def _mle_lambda(probs, expected):
+    """Lagrange multiplier of the closest distribution (in KL) with mean expected
+
+    The constrained MLE is p_i / (1 + lambda * (a_i - expected)); lambda is
+    found by bisection on the interval that keeps every weight positive.
+    """
+    shifts = [score - expected for score in PAIR_SCORES]
+    low = -1 / max(shifts) + 1e-12
+    high = -1 / min(shifts) - 1e-12
+
+    def constraint(lam):
+        return sum(p * shift / (1 + lam * shift) for p, shift in zip(probs, shifts))
+
+    # constraint() is decreasing in lambda
+    for _ in range(100):
+        middle = (low + high) / 2
+        if constraint(middle) > 0:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2
+
+
+def pentanomial_llr(counts, elo0, elo1):
+    """Generalized log-likelihood ratio of H1 (elo1) against H0 (elo0)
+
+    counts are the numbers of game pairs that scored 0, 0.5, 1, 1.5 and 2
+    points for the tested engine.
+    """
+    counts = _regularize(counts)
+    total = sum(counts)
+    probs = [count / total for count in counts]
+    s0, s1 = logistic_score(elo0), logistic_score(elo1)
+    lambda0 = _mle_lambda(probs, s0)
+    lambda1 = _mle_lambda(probs, s1)
+    return total * sum(
+        p * math.log((1 + lambda0 * (score - s0)) / (1 + lambda1 * (score - s1)))
+        for p, score in zip(probs, PAIR_SCORES)
+    )
+
+
+class SPRT:
+    """Sequential probability ratio test on pentanomial game-pair results
+
+    H0: the tested engine is elo0 stronger, H1: it is elo1 stronger. Pairs
+    are added as the tested engine's points over both colours of an opening;
+    status() says which hypothesis was accepted once the LLR leaves
+    [log(beta / (1 - alpha)), log((1 - beta) / alpha)].
+    """
+
+    def __init__(self, elo0=0.0, elo1=5.0, alpha=0.05, beta=0.05):
+        if elo1 <= elo0:
+            raise ValueError("elo1 must be greater than elo0")
+        self.elo0 = elo0
+        self.elo1 = elo1
+        self.alpha = alpha
+        self.beta = beta
+        self.lower = math.log(beta / (1 - alpha))
+        self.upper = math.log((1 - beta) / alpha)
+        self.counts = [0] * 5
+
+    @property
+    def pairs(self):
+        return sum(self.counts)
+
+    def add_pair(self, points):
+        """Record one opening pair worth points (0 to 2) to the tested engine"""
+        self.counts[int(round(points * 2))] += 1
+
+    def llr(self):
+        if not self.pairs:
+            return 0.0
+        return pentanomial_llr(self.counts, self.elo0, self.elo1)
+
+    def status(self):
+        """"H1" or "H0" once a hypothesis is accepted, otherwise None"""
+        llr = self.llr()
+        if llr >= self.upper:
+            return "H1"
+        if llr <= self.lower:
+            return "H0"
+        return None
+
+    def elo(self, z=1.96):
+        """(elo, low, high): Elo estimate with a 95% confidence interval by default"""
+        if not self.pairs:
+            return 0.0, -math.inf, math.inf
+        total = self.pairs
+        mean = sum(count * score for count, score in zip(self.counts, PAIR_SCORES)) / total
+        variance = sum(count * (score - mean) ** 2 for count, score in zip(self.counts, PAIR_SCORES)) / total
+        error = math.sqrt(variance / total)
+        return logistic_elo(mean), logistic_elo(mean - z * error), logistic_elo(mean + z * error)
+
+    def describe(self):
+        elo, low, high = self.elo()
+        return (
+            f"LLR {self.llr():.2f} [{self.lower:.2f}, {self.upper:.2f}]  "
+            f"Elo {elo:+.1f} ({low:+.1f}, {high:+.1f})  "
+            f"Pairs {self.pairs} {self.counts}"
+        )
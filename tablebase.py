@@ -0,0 +1,85 @@
+import chess
+import chess.syzygy
+
+
+WDL_TEXT = {
+    2: "win",
+    1: "cursed win",
+    0: "draw",
+    -1: "blessed loss",
+    -2: "loss",
+}
+
+
+class EndgameTablebase:
+    """Syzygy WDL/DTZ probing for solved endgames
+
+    The tablebase object is opened once; python-chess keeps every table file
+    it has touched open, so repeated probes do not reopen anything.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.tablebase = chess.syzygy.open_tablebase(directory)
+
+    def probe_wdl(self, board):
+        """WDL for the side to move, or None when the position is not covered
+
+        MissingTableError is a KeyError, so both "no table" and "too many
+        pieces" end up here.
+        """
+        if board.castling_rights:
+            return None
+        try:
+            return self.tablebase.probe_wdl(board)
+        except KeyError:
+            return None
+
+    def best_move(self, board):
+        """Return (move, wdl) with the tablebase-optimal move, or None if not covered
+
+        Winning sides prefer mate, then zeroing moves, then the shortest DTZ;
+        losing sides take the longest DTZ.
+        """
+        if board.is_game_over() or self.probe_wdl(board) is None:
+            return None
+
+        ranked = []
+        try:
+            for move in board.legal_moves:
+                zeroing = board.is_zeroing(move)
+                board.push(move)
+                try:
+                    if board.is_checkmate():
+                        ranked.append(((-3, 0, 0), move, 2))
+                        continue
+                    wdl = -self.tablebase.probe_wdl(board)
+                    dtz = abs(self.tablebase.probe_dtz(board))
+                finally:
+                    board.pop()
+
+                if wdl > 0:
+                    key = (-wdl, 0 if zeroing else 1, dtz)
+                elif wdl < 0:
+                    key = (-wdl, 0, -dtz)
+                else:
+                    key = (0, 0, 0)
+                ranked.append((key, move, wdl))
+        except KeyError:
+            # One of the successor positions needs a table we do not have
+            return None
+
+        if not ranked:
+            return None
+        _, move, _ = min(ranked, key=lambda item: item[0])
+        return move, self.probe_wdl(board)
+
+    def describe(self, board, wdl):
+        """Status text such as "Tablebase: White win" for a WDL of the side to move"""
+        side = "White" if board.turn == chess.WHITE else "Black"
+        if wdl == 0:
+            return "Tablebase: draw"
+        return f"Tablebase: {side} {WDL_TEXT[wdl]}"
+
+    def close(self):
+        self.tablebase.close()
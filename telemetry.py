@@ -0,0 +1,145 @@
+import csv
+import functools
+import json
+import threading
+import time
+
+import chess
+
+
+# Column order for CSV export and the stats panel
+FIELDS = (
+    "ply", "move", "side", "source",
+    "think_ms", "queue_ms",
+    "engine_move_ms", "on_engine_move_received_ms", "make_move_ms", "draw_board_ms",
+    "depth", "seldepth", "nodes", "nps", "hashfull", "engine_time_ms",
+)
+
+
+def instrumented(name, ply_offset=1):
+    """Method decorator adding the call's wall time to self.telemetry
+
+    The time is booked on ply len(move_stack) + ply_offset at entry: the move
+    about to be made for engine_move/make_move, the move just made for
+    draw_board (ply_offset=0). Times are inclusive of nested instrumented calls.
+    """
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            ply = len(self.board.move_stack) + ply_offset
+            started = time.perf_counter()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                self.telemetry.add_time(ply, name, time.perf_counter() - started)
+        return wrapper
+    return decorate
+
+
+class MoveTelemetry:
+    """Per-ply timings and engine statistics for the current game
+
+    Engine callbacks report from the service thread, everything else from
+    the Tk thread, so updates go through a lock. queue_ms is the time a
+    result waited in the Tk event queue between root.after(0, ...) and its
+    callback running.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.plies = {}
+            self._posted = {}
+
+    def _ply(self, ply):
+        record = self.plies.get(ply)
+        if record is None:
+            record = self.plies[ply] = {"ply": ply}
+        return record
+
+    def add_time(self, ply, name, seconds):
+        key = f"{name}_ms"
+        with self._lock:
+            record = self._ply(ply)
+            record[key] = record.get(key, 0.0) + seconds * 1000
+
+    def record_move(self, board, move):
+        """Note the move about to be pushed on board"""
+        with self._lock:
+            record = self._ply(len(board.move_stack) + 1)
+            record["move"] = board.san(move)
+            record["side"] = "white" if board.turn == chess.WHITE else "black"
+            record.setdefault("source", "player")
+
+    def record_search(self, ply, info, seconds):
+        """Engine statistics for the search that produced ply"""
+        with self._lock:
+            record = self._ply(ply)
+            record["think_ms"] = seconds * 1000
+            for key in ("depth", "seldepth", "nodes", "nps", "hashfull"):
+                if key in info:
+                    record[key] = info[key]
+            if "time" in info:
+                record["engine_time_ms"] = info["time"] * 1000
+
+    def mark_posted(self, ply, source):
+        """A move for ply was handed to the Tk thread with root.after"""
+        with self._lock:
+            self._ply(ply)["source"] = source
+            self._posted[ply] = time.perf_counter()
+
+    def mark_received(self, ply):
+        with self._lock:
+            posted = self._posted.pop(ply, None)
+            if posted is not None:
+                self._ply(ply)["queue_ms"] = (time.perf_counter() - posted) * 1000
+
+    def truncate(self, ply):
+        """Forget plies after ply (after an undo)"""
+        with self._lock:
+            for key in [key for key in self.plies if key > ply]:
+                del self.plies[key]
+            self._posted = {key: value for key, value in self._posted.items() if key <= ply}
+
+    def records(self):
+        """Ply records in order, with times rounded to microseconds"""
+        with self._lock:
+            records = [dict(self.plies[ply]) for ply in sorted(self.plies)]
+        for record in records:
+            for key, value in record.items():
+                if key.endswith("_ms"):
+                    record[key] = round(value, 3)
+        return records
+
+    def summary(self):
+        """Mean and max of each timing over the recorded plies"""
+        records = self.records()
+        summary = {}
+        for key in FIELDS:
+            if not key.endswith("_ms"):
+                continue
+            values = [record[key] for record in records if key in record]
+            if values:
+                summary[key] = {
+                    "mean": round(sum(values) / len(values), 3),
+                    "max": round(max(values), 3),
+                    "count": len(values),
+                }
+        return summary
+
+    def write_json(self, path, headers=None):
+        with open(path, 'w') as f:
+            json.dump({
+                "headers": dict(headers or {}),
+                "summary": self.summary(),
+                "plies": self.records(),
+            }, f, indent=2)
+
+    def write_csv(self, path):
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDS, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(self.records())